@@ -18,17 +18,21 @@ is randomly shuffled and the pattern with the greatest separation between
 subsequent patterns is chosen. This array is the exported to a .txt file that
 can be read by the Polygon400.
 
+The work is done by polygongrid.generate() when the script is run; importing
+it only defines the parameters and helper functions. For other layouts, or
+several at once, use `python -m polygongrid` instead of editing this file.
+
 """
 import numpy as np
-import random as rd
 import math
 #import scipy as sp
 #import scipy.spatial as spt
 #import matplotlib
 #import matplotlib.pyplot as plt
-import time
+import sys
 
-np.set_printoptions(threshold=np.nan)
+from polygongrid import DistanceTable, OrderCache, OrderNotFoundError, RunStats, SpotGrid, generate
+from polygongrid.polygonlog import matrixpos_to_gridpos, read_order as read_polygon_order
 
 # ---------------------------------------------------------------
 """                   Grid parameters                         """
@@ -44,7 +48,17 @@ separation = 1      #0=ordered, 1=maxseparated
 start_pattern = 137    #start with stim in the middle of the grid (0-indexed)     
 min_distance = 5
 max_distance = 40 
-iterations = 1000000
+seed = None     #master seed of the order search, which bypasses the cache and always gives the same order;
+                #None = use the cached order, or search with seed 0
+restarts = 8     #independent search runs, the best order is kept
+optimize_moves = 200000     #local search moves per run
+workers = 1     #processes for the search, None = all CPUs
+target_min_distance = None     #stop searching once an order reaches this minimum distance, None = use all restarts
+use_cache = 1     #reuse the best order found before for the same parameters: Yes = 1, No = 0
+refine_cached = 0     #keep optimizing a cached order instead of using it as is: Yes = 1, No = 0
+cache_file = None     #order cache location, None = default (~/.cache/polygongrid/orders.sqlite)
+stats_file = None     #write per-stage timings and counters to this JSON file, None = only print them
+profile = 0     #run under cProfile and print the slowest functions: Yes = 1, No = 0
 
 
 # ---------------------------------------------------------------
@@ -66,14 +80,9 @@ def grid_distance(grid1,grid2):
     coldist = index1[1][0] - index2[1][0]
     return(np.sqrt((rowdist)**2+(coldist)**2))
 
-#Calcualte distance between two stim patterns, with the two ordered pattern numbers as input
+#Calcualte distance between two stim patterns, with the two 0-indexed ordered pattern numbers as input
 def position_distance(pattern_number1,pattern_number2):   
-    position1 = ordered_gridposition(pattern_number1)
-    position2 = ordered_gridposition(pattern_number2)
-    rowdist = position1[0] - position2[0]
-    coldist = position1[1] - position2[1]
-    pos_distance = np.sqrt((rowdist)**2+(coldist)**2)
-    return(pos_distance)
+    return(distance_table.distance(pattern_number1,pattern_number2))
     
 def grid_distance_stats(grid):    #Calculate sum,avg,min of distances between adjacent patterns in a 3D grid
     distsum = 0 #initialize distance variable
@@ -85,15 +94,10 @@ def grid_distance_stats(grid):    #Calculate sum,avg,min of distances between ad
     average_dist = dist_vector.mean()
     return(min_dist,average_dist)
      
-def pos_distance_stats(grid_order):    #Calculate sum,avg,min of distances between adjacent patterns in a 3D  grid (0-indexed)
-    distsum = 0 
+def pos_distance_stats(grid_order):    #Calculate avg,min of distances between adjacent patterns in a 3D  grid (0-indexed)
     global dist_vector 
-    dist_vector = []
-    for i in range(stim_number-1):   #For each pattern
-        distsum += position_distance(grid_order[i],grid_order[i+1]) 
-        dist_vector.append(position_distance(grid_order[i],grid_order[i+1]))
-    min_dist = np.min(dist_vector)
-    average_dist = np.mean(dist_vector)
+    min_dist,average_dist,dist_vector = distance_table.order_stats(grid_order)
+    dist_vector = list(dist_vector)
     return(min_dist,average_dist,dist_vector)
 
 def reorder(grid,order):    #reorder patterns according to order vector
@@ -105,27 +109,14 @@ def reorder(grid,order):    #reorder patterns according to order vector
         counter += 1
     return(newgrid)
     
-def matrixpos2gridpos(matrixpos):      #convert matrix position to ordered pattern position
-    matrixpos -= 1 #Convert from 1-indexed to 0-indexed
-    row_counter = math.floor(matrixpos/23)
-    orderedpos = int((matrixpos-row_counter*11)/2)
-    #orderedpos += 1 #Convert from 0-indexed to 1-indexed
-    return(orderedpos)
+def matrixpos2gridpos(matrixpos):      #convert 1-indexed matrix position to 0-indexed ordered pattern position
+    return(int(matrixpos_to_gridpos(matrixpos,column_number,stim_columns,grid_block_size,stim_rows)))
     
 def read_order(polygon_output):
     #Output order from polygon is 1-indexed
     #read_order("12x24grid_spaced_output.txt")
-    order = list(np.loadtxt(polygon_output,dtype=int)[:,3])
-    output_columns = list(np.loadtxt(polygon_output,dtype=int)[:,1])[0]
-    grid_res = math.ceil(output_columns/12)
     global output_order
-    output_order = []
-    for i in range(288):
-        order[i] -= 1 #Convert from 1-indexed to 0-indexed
-        row_position = math.floor(order[i]/(grid_res*output_columns))
-        column_position = (order[i]-(grid_res*output_columns*row_position))/grid_res
-        gridpos = int(row_position*stim_columns + column_position)
-        output_order.append(gridpos) 
+    output_order = read_polygon_order(polygon_output,stim_rows,stim_columns,grid_resolution).tolist()
     return(output_order)
     
     
@@ -133,72 +124,16 @@ def read_order(polygon_output):
 """                     Generate grid                         """
 # ---------------------------------------------------------------
 
-grid_block_size = grid_resolution + 1    #grid_block_size also includes the 1 blank space between each spot
-row_number = grid_block_size*stim_rows - 1  #The -1 avoids the unnecessary last 0 in each row
-column_number = grid_block_size*stim_columns - 1    #The -1 avoids the unnecessary bottom 0 in each column
-stim_number = stim_rows * stim_columns
-if all_stims == 0:
-    ordered_grid = np.zeros([row_number,column_number,stim_number],dtype=int)
-else:
-    ordered_grid = np.zeros([row_number,column_number,stim_number+1],dtype=int)  
-
-pattern_number = 0
-#find top left pixel of each pattern spot:
-for row in np.arange(0,len(ordered_grid[:,0,0]),grid_block_size):    #For each pattern row (skipping blank space rows)
-    for column in np.arange(0,len(ordered_grid[0,:,0]),grid_block_size):  #For each pattern column (skipping blank space columns)
-        #replace pixel values with 1s:
-        for r in range(grid_resolution):
-            for c in range(grid_resolution):
-                ordered_grid[row+r,column+c,pattern_number] = 1  
-        pattern_number += 1
-
-    
-#Reorder stims to maximise pattern separation. Iteratively create random vector such that euclidean distance >= min_distance
-start = time.time()
-random_order = [start_pattern]
-ordered_list = list(np.arange(stim_number))
-ordered_list.remove(start_pattern)
-error_count = 0
-counter = 0
-for i in range(iterations):
-    while len(ordered_list) > 0:
-        next_position = rd.sample(ordered_list,1)[0]
-        if min_distance < position_distance(random_order[counter],next_position) < max_distance: 
-            random_order.append(next_position)
-            ordered_list.remove(next_position)
-            counter += 1
-            error_count = 0 #reset error counter
-        else:
-            error_count += 1
-            if error_count > len(ordered_grid):
-                break   #if all numbers have been tried (avoid infinite loop)
-    if len(ordered_list) == 0:
-        print('Success!')
-        break
+spot_grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+grid_block_size = spot_grid.block_size    #grid_block_size also includes the 1 blank space between each spot
+row_number = spot_grid.row_number  #The -1 avoids the unnecessary last 0 in each row
+column_number = spot_grid.column_number    #The -1 avoids the unnecessary bottom 0 in each column
+stim_number = spot_grid.stim_number
+distance_table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
 
-end = time.time()
-print(end - start)
-
-if len(ordered_list)==0:
-    maxseparated_order = random_order[:]
-else:
-    maxseparated_order = list(np.arange(stim_number))
-
-        
-
-# Remix patterns with smallest distance and largest distance to increase mindist
-mindist = 0
-for i in range(1000):
-    mindist = max(mindist,pos_distance_stats(maxseparated_order)[0])
-    smallest_distance_index = dist_vector.index(min(dist_vector))
-    largest_distance_index = dist_vector.index(max(dist_vector))
-    smallest_distance = maxseparated_order.pop(smallest_distance_index)
-    maxseparated_order.insert(largest_distance_index,smallest_distance)
-    if pos_distance_stats(maxseparated_order)[0] > mindist:
-        print('Success!')
-        break
-
-print('mindist =',mindist)
+# ---------------------------------------------------------------
+"""                     Previous orders                       """
+# ---------------------------------------------------------------
 
 #All orders are 0-indexed:
 #maxseparated_order8 = [137, 18, 219, 134, 226, 125, 39, 146, 283, 60, 178, 31, 26, 168, 93, 154, 7, 123, 76, 5, 149, 278, 2, 185, 88, 29, 22, 186, 193, 109, 198, 68, 161, 243, 164, 79, 214, 64, 211, 55, 47, 210, 204, 113, 285, 33, 140, 196, 273, 277, 1, 225, 141, 238, 3, 220, 35, 218, 248, 57, 187, 73, 71, 41, 263, 235, 215, 121, 236, 252, 100, 270, 122, 256, 153, 15, 264, 224, 8, 61, 237, 56, 223, 274, 89, 267, 260, 119, 269, 130, 169, 67, 51, 180, 148, 208, 45, 160, 74, 30, 10, 151, 231, 52, 165, 233, 158, 247, 216, 266, 23, 242, 258, 156, 114, 244, 24, 4, 221, 103, 63, 202, 77, 234, 106, 14, 172, 107, 199, 286, 197, 150, 239, 138, 78, 131, 282, 162, 118, 49, 91, 254, 132, 246, 179, 44, 222, 117, 135, 203, 159, 19, 38, 48, 75, 272, 9, 188, 155, 58, 255, 86, 95, 99, 167, 25, 80, 127, 83, 85, 190, 253, 87, 177, 81, 230, 66, 128, 262, 104, 6, 142, 133, 175, 115, 209, 280, 152, 212, 21, 183, 90, 181, 227, 102, 0, 96, 276, 144, 69, 173, 143, 241, 126, 184, 189, 111, 250, 191, 62, 249, 170, 11, 182, 110, 82, 43, 171, 98, 166, 257, 46, 116, 240, 27, 124, 108, 53, 194, 105, 36, 174, 101, 279, 271, 65, 157, 206, 192, 32, 281, 72, 195, 200, 129, 16, 232, 17, 228, 136, 213, 112, 245, 97, 34, 37, 92, 40, 207, 94, 28, 145, 261, 50, 259, 251, 163, 13, 84, 201, 229, 12, 217, 139, 275, 147, 284, 205, 59, 268, 20, 176, 120, 287, 54, 70, 42, 265]
@@ -210,51 +145,45 @@ print('mindist =',mindist)
 #maxseparated_order14 = [137, 22, 257, 51, 176, 16, 177, 268, 91, 267, 102, 191, 83, 200, 27, 229, 46, 112, 5, 205, 1, 171, 214, 120, 54, 180, 24, 232, 36, 117, 247, 8, 161, 248, 74, 230, 111, 273, 119, 279, 162, 37, 269, 31, 195, 282, 127, 228, 10, 245, 134, 259, 135, 280, 97, 263, 132, 21, 193, 81, 281, 99, 184, 13, 175, 272, 124, 287, 145, 179, 88, 242, 146, 25, 270, 49, 196, 141, 35, 212, 9, 110, 190, 42, 239, 144, 234, 116, 249, 157, 94, 123, 231, 164, 17, 198, 26, 125, 238, 57, 151, 68, 275, 78, 261, 158, 6, 219, 108, 189, 61, 246, 29, 168, 19, 221, 84, 256, 4, 133, 241, 122, 211, 71, 185, 69, 225, 33, 170, 2, 210, 28, 217, 105, 223, 12, 235, 131, 271, 152, 284, 38, 140, 85, 255, 147, 274, 77, 159, 63, 276, 62, 172, 59, 264, 156, 18, 243, 48, 138, 227, 87, 169, 43, 192, 92, 237, 101, 11, 107, 75, 188, 70, 250, 103, 199, 64, 118, 285, 148, 202, 72, 139, 50, 142, 20, 160, 23, 115, 218, 106, 0, 174, 286, 209, 30, 260, 173, 96, 244, 126, 39, 222, 104, 265, 153, 41, 181, 47, 240, 73, 166, 15, 216, 283, 82, 252, 155, 183, 178, 79, 197, 65, 251, 114, 204, 128, 226, 76, 194, 130, 182, 44, 201, 45, 206, 100, 258, 55, 215, 52, 224, 80, 167, 90, 253, 95, 121, 278, 93, 7, 203, 34, 186, 53, 163, 254, 150, 277, 89, 165, 233, 67, 207, 3, 236, 136, 56, 109, 14, 149, 40, 213, 98, 187, 32, 143, 60, 154, 208, 113, 58, 262, 129, 266, 66, 220, 86]
 #maxseparated_order14p5 = [151, 22, 137, 257, 51, 176, 16, 177, 268, 91, 267, 102, 191, 83, 200, 27, 229, 46, 112, 5, 205, 1, 171, 214, 120, 54, 180, 24, 232, 36, 117, 247, 8, 161, 248, 74, 230, 111, 273, 119, 279, 162, 37, 113, 10, 269, 31, 195, 282, 127, 228, 57, 245, 134, 259, 135, 280, 97, 263, 132, 21, 193, 81, 281, 184, 13, 175, 272, 124, 287, 145, 179, 88, 242, 146, 25, 183, 155, 252, 143, 32, 270, 49, 141, 35, 212, 9, 110, 190, 42, 239, 144, 234, 116, 249, 157, 94, 123, 231, 164, 17, 198, 26, 125, 238, 68, 275, 78, 261, 158, 6, 219, 108, 189, 61, 246, 29, 168, 19, 221, 84, 256, 99, 4, 133, 241, 122, 211, 71, 185, 69, 225, 33, 170, 2, 210, 28, 217, 105, 223, 12, 235, 131, 271, 152, 284, 196, 38, 140, 85, 255, 147, 274, 77, 159, 63, 276, 62, 172, 59, 264, 156, 18, 243, 48, 138, 227, 87, 169, 43, 192, 92, 237, 101, 11, 107, 75, 188, 70, 250, 103, 199, 64, 118, 285, 148, 202, 72, 139, 50, 142, 20, 160, 23, 115, 218, 106, 0, 174, 286, 209, 30, 260, 173, 96, 244, 126, 39, 222, 104, 265, 153, 41, 181, 47, 240, 73, 166, 15, 216, 283, 82, 178, 79, 197, 65, 251, 114, 204, 128, 226, 76, 194, 130, 182, 44, 201, 45, 206, 100, 258, 55, 215, 52, 224, 80, 167, 90, 253, 95, 121, 278, 93, 7, 203, 34, 186, 53, 163, 254, 150, 277, 89, 165, 233, 67, 207, 3, 236, 136, 56, 109, 14, 149, 40, 213, 98, 187, 60, 154, 208, 58, 262, 129, 266, 66, 220, 86]
 #maxseparated_order14p6 = [151, 22, 137, 257, 51, 176, 16, 177, 268, 91, 267, 102, 191, 83, 200, 27, 229, 46, 112, 5, 205, 1, 171, 214, 120, 54, 180, 159, 118, 199, 285, 77, 204, 89, 24, 114, 232, 32, 247, 117, 8, 161, 248, 74, 230, 111, 273, 119, 279, 113, 217, 150, 10, 165, 254, 37, 269, 162, 31, 195, 282, 127, 228, 57, 245, 134, 259, 135, 280, 97, 263, 132, 21, 193, 81, 281, 184, 13, 175, 272, 124, 287, 145, 179, 88, 242, 146, 25, 183, 155, 252, 143, 64, 270, 49, 141, 35, 212, 9, 110, 190, 42, 239, 144, 234, 116, 249, 157, 94, 123, 231, 164, 17, 198, 26, 125, 238, 68, 275, 78, 261, 158, 6, 219, 108, 189, 61, 246, 29, 168, 19, 221, 84, 256, 99, 4, 133, 241, 122, 211, 71, 185, 69, 225, 33, 170, 2, 210, 28, 223, 12, 105, 235, 131, 271, 152, 284, 196, 38, 140, 85, 255, 147, 274, 148, 276, 63, 36, 62, 172, 59, 264, 156, 18, 243, 48, 138, 227, 87, 169, 43, 192, 92, 237, 101, 11, 107, 75, 188, 70, 250, 103, 202, 72, 139, 50, 142, 20, 160, 23, 115, 218, 106, 0, 174, 286, 209, 30, 260, 173, 96, 244, 126, 39, 222, 104, 265, 153, 41, 181, 47, 240, 73, 166, 15, 216, 283, 82, 178, 79, 197, 65, 251, 128, 226, 76, 194, 130, 182, 44, 201, 45, 206, 100, 258, 55, 215, 52, 224, 80, 167, 90, 253, 95, 121, 278, 93, 7, 203, 34, 186, 53, 233, 67, 207, 3, 163, 277, 236, 136, 56, 109, 14, 149, 40, 213, 98, 187, 60, 154, 208, 58, 262, 129, 266, 66, 220, 86]
-   
-final_order = [137,22,257,51,177,16,268,91,267,102,191,83,200,27,229,46,112,5,205,1,171,269,36,117,247,8,161,248,74,230,111,273,119,279,162,37,195,282,127,228,10,245,134,259,135,280,97,263,132,21,193,81,281,99,184,13,175,272,124,287,145,179,88,242,146,25,270,49,196,31,141,35,212,9,110,190,42,239,120,214,144,234,116,249,157,94,176,54,123,231,164,17,198,26,125,238,57,151,68,275,78,261,158,6,219,108,189,61,246,29,168,19,221,84,256,4,133,241,122,211,71,185,69,225,33,170,2,210,28,217,12,235,131,271,152,284,38,140,85,255,147,274,77,159,63,276,62,172,59,264,156,18,243,48,180,138,227,87,169,43,192,92,237,101,11,107,75,188,70,250,103,199,64,118,285,148,202,72,139,50,142,20,160,23,115,218,106,0,209,286,30,260,173,96,244,126,39,222,104,265,153,41,181,47,240,73,174,15,283,82,252,155,183,166,216,178,79,197,65,251,114,204,128,226,76,194,130,182,44,201,45,206,100,258,55,215,52,224,24,80,167,90,253,95,121,278,93,7,203,34,186,53,223,105,232,163,254,150,277,89,165,233,67,207,3,236,136,56,109,14,149,40,213,98,187,32,143,60,154,208,113,58,262,129,266,66,220,86]
-maxseparated_order = final_order
-
-#Choose grid order that is most separated
-if separation == 0:
-        maxseparated_order = list(np.arange(stim_number))
-        
-reorder(ordered_grid, maxseparated_order)
 
-if all_stims == 1:
-    maxseparated_order.append(stim_number+1)
-    for i in range(stim_number):
-        newgrid[:,:,-1] += newgrid[:,:,i]
+#Best hand-optimized order before the order cache (12x24 grid, start_pattern 137), kept for reference:
+final_order = [137,22,257,51,177,16,268,91,267,102,191,83,200,27,229,46,112,5,205,1,171,269,36,117,247,8,161,248,74,230,111,273,119,279,162,37,195,282,127,228,10,245,134,259,135,280,97,263,132,21,193,81,281,99,184,13,175,272,124,287,145,179,88,242,146,25,270,49,196,31,141,35,212,9,110,190,42,239,120,214,144,234,116,249,157,94,176,54,123,231,164,17,198,26,125,238,57,151,68,275,78,261,158,6,219,108,189,61,246,29,168,19,221,84,256,4,133,241,122,211,71,185,69,225,33,170,2,210,28,217,12,235,131,271,152,284,38,140,85,255,147,274,77,159,63,276,62,172,59,264,156,18,243,48,180,138,227,87,169,43,192,92,237,101,11,107,75,188,70,250,103,199,64,118,285,148,202,72,139,50,142,20,160,23,115,218,106,0,209,286,30,260,173,96,244,126,39,222,104,265,153,41,181,47,240,73,174,15,283,82,252,155,183,166,216,178,79,197,65,251,114,204,128,226,76,194,130,182,44,201,45,206,100,258,55,215,52,224,24,80,167,90,253,95,121,278,93,7,203,34,186,53,223,105,232,163,254,150,277,89,165,233,67,207,3,236,136,56,109,14,149,40,213,98,187,32,143,60,154,208,113,58,262,129,266,66,220,86]
 
 # ---------------------------------------------------------------
-"""                     Generate grid                         """
-# ---------------------------------------------------------------    
-
-#Export matrix to a .txt file and append additional text to allow Polygon400 to generate a stimulus grid
-
-gridstring = '''MightexVector1.0
-# Mightex Vector file for 12 x 24 grid scan with space between stimuli.
-# Minimum Distance = , Average Distance = 
-# Type and BitDepth
-Grid
-1
-# Columns and Rows\n''' +str(column_number) +'\n' + str(row_number)
-
-
-for pattern in range(len(newgrid[0,0,:])):
-    gridstring += ('\n#======== Pattern '+str(pattern+1)+', Row = '+str(ordered_gridposition(maxseparated_order[pattern]+1)[0])
-                   +', Column = '+str(ordered_gridposition(maxseparated_order[pattern]+1)[1])+' ========\n')
-    gridstring += 'Bin '
-    patternstring = ''      # initialize pattern string
-    for i in range(len(newgrid[:,0,0])):    #for every grid row
-        rowstring = ' '.join(str(e)+'' for e in newgrid[i,:,pattern]) #add every colum value to the row
-        if i>0:
-            patternstring += '    '+ rowstring + ';\n'
-        else:
-            patternstring += rowstring + ';\n'
-    gridstring += patternstring
+"""                  Order and export grid                    """
+# ---------------------------------------------------------------
 
-counter = 0
-filename = output_file
-f = open(filename,'w')
-f.write(gridstring)
-f.close()
\ No newline at end of file
+if __name__ == '__main__':
+    np.set_printoptions(threshold=sys.maxsize)
+
+    #Reorder stims to maximise pattern separation. The best order known for these parameters comes from the order
+    #cache; otherwise independent seeded runs each build an order in which every step lies within
+    #(min_distance, max_distance) and improve it by local search, and the most separated order is kept and cached.
+    #The patterns are then streamed to output_file in that order, in the MightexVector1.0 format read by the Polygon400
+    order_cache = OrderCache(cache_file) if use_cache else None
+    stats = RunStats(profile=bool(profile))
+    try:
+        layout = generate(stim_rows, stim_columns, grid_resolution, output_file, all_stims=all_stims,
+                          separated=separation, start_pattern=start_pattern, min_distance=min_distance,
+                          max_distance=max_distance, seed=seed, restarts=restarts, optimize_moves=optimize_moves,
+                          workers=workers, cache=order_cache, refine=refine_cached,
+                          target_min_distance=target_min_distance, stats=stats)
+        if separation == 1:
+            print('Success! Order from', layout.source)
+    except OrderNotFoundError as error:
+        print('No separated order:', error)
+        layout = generate(stim_rows, stim_columns, grid_resolution, output_file, all_stims=all_stims,
+                          separated=False, min_distance=min_distance, max_distance=max_distance, stats=stats)
+    finally:
+        if order_cache is not None:
+            order_cache.close()
+    print(stats.summary())
+    if stats_file is not None:
+        stats.to_json(stats_file)
+    if profile:
+        print(stats.profile_report())
+
+    maxseparated_order = layout.order
+    mindist = layout.min_distance
+    bytes_written = layout.bytes_written
+    print('mindist =',mindist)
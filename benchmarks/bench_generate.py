@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark for layout generation across grid sizes.
+
+Every size runs in a fresh process, which times the grid construction, the
+order search and optimization, and the export (written to os.devnull by
+default), and reports the process's peak resident memory. Results can be
+saved as JSON and compared against a saved baseline; any stage that got
+slower, or peak memory that grew, by more than the tolerance is reported
+and the exit status is 1.
+
+Run from the repository root:
+    python benchmarks/bench_generate.py --save baseline.json
+    python benchmarks/bench_generate.py --compare baseline.json
+    python benchmarks/bench_generate.py --sizes 12x24:3 64x128:1 --optimize-moves 50000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from polygongrid.cli import parse_layout
+
+DEFAULT_SIZES = ['12x24:3', '24x48:3', '48x96:3', '64x128:3']
+MIN_SECONDS = 0.05      #stages faster than this in the baseline are too noisy to compare
+
+
+def peak_memory_mb():     #peak resident memory of this process, None where the resource module is missing
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak/1e6 if sys.platform == 'darwin' else peak/1e3     #bytes on macOS, kilobytes on Linux
+
+
+def bench_layout(stim_rows, stim_columns, grid_resolution, output_file, options):
+    from polygongrid import RunStats, SpotGrid, generate
+
+    stats = RunStats()
+    start = time.perf_counter()
+    layout = generate(stim_rows, stim_columns, grid_resolution, output_file, stats=stats, **options)
+    total = time.perf_counter() - start
+    with stats.stage('stack_packed'):
+        SpotGrid(stim_rows, stim_columns, grid_resolution).stack(layout.order, all_stims=True, packed=True)
+    return {'total': total, 'stages': stats.stages, 'counters': stats.counters, 'peak_mb': peak_memory_mb()}
+
+
+def run_isolated(size, output_file, options):
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(bench_layout, parse_layout(size) + (output_file, options))
+
+
+def compare(results, baseline, tolerance):     #list of regression messages
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get(size)
+        if base is None:
+            continue
+        metrics = dict(('stage %s' % name, (seconds, base['stages'].get(name)))
+                       for name, seconds in result['stages'].items())
+        metrics['total'] = (result['total'], base['total'])
+        for name, (new, old) in metrics.items():
+            if old is not None and old >= MIN_SECONDS and new > old*(1 + tolerance):
+                regressions.append('%s %s: %.3f s -> %.3f s' % (size, name, old, new))
+        if result['peak_mb'] and base.get('peak_mb') and result['peak_mb'] > base['peak_mb']*(1 + tolerance):
+            regressions.append('%s peak memory: %.1f MB -> %.1f MB' % (size, base['peak_mb'], result['peak_mb']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, metavar='ROWSxCOLUMNS[:RESOLUTION]')
+    parser.add_argument('--output', default=os.devnull, help='pattern file to write (default: %(default)s)')
+    parser.add_argument('--restarts', type=int, default=1)
+    parser.add_argument('--optimize-moves', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown (default: 0.25)')
+    args = parser.parse_args(argv)
+    options = dict(restarts=args.restarts, optimize_moves=args.optimize_moves, seed=args.seed, workers=1)
+
+    results = {}
+    print('%-12s %8s %8s %8s %8s %9s %8s' % (
+        'grid', 'total s', 'order s', 'export s', 'stack s', 'MB/s', 'peak MB'))
+    for size in args.sizes:
+        result = results[size] = run_isolated(size, args.output, options)
+        stages = result['stages']
+        print('%-12s %8.3f %8.3f %8.3f %8.3f %9.1f %8s' % (
+            size, result['total'], stages.get('order', 0), stages.get('export', 0),
+            stages['stack_packed'], result['counters'].get('export.mb_per_s', 0),
+            '-' if result['peak_mb'] is None else '%.1f' % result['peak_mb']))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare SpotGrid.stack against the original per-pixel grid construction loop.
+
+Run from the repository root:
+    python benchmarks/bench_grid.py
+    python benchmarks/bench_grid.py --sizes 12x24:3 48x96:8 --skip-stack-above 2000000000
+
+The unpacked stack of 48x96:8 alone takes about 1.7 GB, so it is not in the
+default sizes and is skipped unless --skip-stack-above allows it.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from polygongrid import SpotGrid
+
+
+def legacy_grid(stim_rows, stim_columns, grid_resolution, all_stims=1):
+    #Original "Generate grid" loop from PolygonGrid_12x24_highRes.py
+    grid_block_size = grid_resolution + 1
+    row_number = grid_block_size*stim_rows - 1
+    column_number = grid_block_size*stim_columns - 1
+    stim_number = stim_rows * stim_columns
+    ordered_grid = np.zeros([row_number,column_number,stim_number+all_stims],dtype=int)
+    pattern_number = 0
+    for row in np.arange(0,len(ordered_grid[:,0,0]),grid_block_size):
+        for column in np.arange(0,len(ordered_grid[0,:,0]),grid_block_size):
+            for r in range(grid_resolution):
+                for c in range(grid_resolution):
+                    ordered_grid[row+r,column+c,pattern_number] = 1
+            pattern_number += 1
+    if all_stims == 1:
+        for i in range(stim_number):
+            ordered_grid[:,:,-1] += ordered_grid[:,:,i]
+    return ordered_grid
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def parse_size(text):    #'ROWSxCOLUMNS:RESOLUTION' -> (stim_rows, stim_columns, grid_resolution)
+    shape, _, resolution = text.partition(':')
+    rows, columns = shape.lower().split('x')
+    return int(rows), int(columns), int(resolution or 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=[(12, 24, 3), (24, 12, 3), (24, 48, 4), (32, 64, 4)])
+    parser.add_argument('--skip-legacy-above', type=int, default=50000000,
+                        help='skip the legacy loop when the int64 stack has more elements than this')
+    parser.add_argument('--skip-stack-above', type=int, default=500000000,
+                        help='skip the unpacked bool stack when it has more elements (bytes) than this')
+    args = parser.parse_args(argv)
+
+    print('%-12s %12s %10s %10s %10s %10s %10s' % (
+        'grid', 'elements', 'legacy s', 'stack s', 'packed s', 'stack MB', 'packed MB'))
+    for stim_rows, stim_columns, grid_resolution in args.sizes:
+        grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+        elements = grid.row_number*grid.column_number*(grid.stim_number + 1)
+        if elements <= args.skip_stack_above:
+            stack_time, stack = timed(grid.stack, all_stims=True)
+            stack_text = '%10.3f' % stack_time
+            stack_mb_text = '%10.1f' % (stack.nbytes/1e6)
+            del stack
+        else:
+            stack_text = stack_mb_text = '%10s' % 'skipped'
+        packed_time, packed = timed(grid.stack, all_stims=True, packed=True)
+        packed_mb = packed.nbytes/1e6
+        del packed
+        if elements <= args.skip_legacy_above:
+            legacy_time, legacy = timed(legacy_grid, stim_rows, stim_columns, grid_resolution)
+            del legacy
+            legacy_text = '%10.3f' % legacy_time
+        else:
+            legacy_text = '%10s' % 'skipped'
+        print('%-12s %12d %s %s %10.3f %s %10.1f' % (
+            '%dx%d:%d' % (stim_rows, stim_columns, grid_resolution), elements,
+            legacy_text, stack_text, packed_time, stack_mb_text, packed_mb))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Report the minimum/mean step distance reached by optimize_order against time
+on the 12x24 grid, next to the hand-optimized final_order from
+PolygonGrid_12x24_highRes.py.
+
+Run from the repository root:
+    python benchmarks/bench_optimize.py
+    python benchmarks/bench_optimize.py --budgets 1 5 30 --seed 3
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from polygongrid import DistanceTable, warnsdorff_order
+from polygongrid.optimize import optimize_order
+
+
+def script_final_order():
+    #final_order literal from the script, read without running the script
+    with open(os.path.join(ROOT, 'PolygonGrid_12x24_highRes.py')) as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'final_order' for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError('final_order not found in PolygonGrid_12x24_highRes.py')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budgets', nargs='+', type=float, default=[0.5, 1, 2, 5, 10],
+                        help='time limits in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-pattern', type=int, default=137)
+    parser.add_argument('--min-distance', type=float, default=5)
+    parser.add_argument('--max-distance', type=float, default=40)
+    args = parser.parse_args(argv)
+
+    table = DistanceTable(24, 12, args.min_distance, args.max_distance)
+    final_order = script_final_order()
+    final_min, final_mean, _ = table.order_stats(final_order)
+    start = time.perf_counter()
+    initial = warnsdorff_order(table, args.start_pattern, seed=args.seed)
+    construct_time = time.perf_counter() - start
+    initial_min, initial_mean, _ = table.order_stats(initial)
+
+    print('%-28s %8s %8s %8s %10s' % ('order', 'time s', 'min', 'mean', 'moves'))
+    print('%-28s %8s %8.3f %8.3f %10s' % ('final_order (script)', '-', final_min, final_mean, '-'))
+    print('%-28s %8.3f %8.3f %8.3f %10s' % ('warnsdorff_order', construct_time, initial_min, initial_mean, '-'))
+    for budget in args.budgets:
+        result = optimize_order(table, initial, time_limit=budget, seed=args.seed)
+        print('%-28s %8.3f %8.3f %8.3f %10d' % (
+            'optimized from warnsdorff', result.elapsed, result.min_distance, result.mean_distance, result.moves))
+    for budget in args.budgets:
+        result = optimize_order(table, final_order, time_limit=budget, seed=args.seed)
+        print('%-28s %8.3f %8.3f %8.3f %10d' % (
+            'optimized from final_order', result.elapsed, result.min_distance, result.mean_distance, result.moves))
+
+
+if __name__ == '__main__':
+    main()
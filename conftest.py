@@ -0,0 +1 @@
+# Lets pytest import the polygongrid package from the repository root.
@@ -0,0 +1,40 @@
+"""
+Building blocks for generating Mightex Polygon400 stimulus grids.
+
+generate() produces a complete MightexVector1.0 pattern file for sCRACM
+experiments, and `python -m polygongrid` does the same from the command line
+for one or more layouts. The PolygonGrid_12x24_highRes.py script is a thin
+parameter sheet around generate().
+
+Submodules are imported on first use of one of their names, so importing
+the package itself does no work.
+"""
+import importlib
+
+_exports = {
+    'FoundOrder': 'cache', 'OrderCache': 'cache', 'OrderKey': 'cache', 'find_order': 'cache',
+    'DistanceTable': 'distance',
+    'VectorFileWriter': 'export', 'write_vector_file': 'export',
+    'SpotGrid': 'grid',
+    'Layout': 'layout', 'generate': 'layout',
+    'OptimizeResult': 'optimize', 'optimize_order': 'optimize',
+    'InfeasibleOrderError': 'ordering', 'OrderNotFoundError': 'ordering',
+    'warnsdorff_order': 'ordering',
+    'SearchResult': 'parallel', 'parallel_search': 'parallel',
+    'read_order': 'polygonlog', 'read_orders': 'polygonlog',
+    'RunStats': 'stats',
+}
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(importlib.import_module('.' + _exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
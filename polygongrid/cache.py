@@ -0,0 +1,160 @@
+"""
+Persistent cache of the best order found for each set of grid parameters.
+
+Orders are stored with their step statistics in a small SQLite database,
+keyed by OrderKey. Only the best order per key is kept, and the least
+recently used keys are pruned once the cache holds more than max_entries.
+
+The key does not include the search seed. Each order is instead stored with
+its provenance (the master seed and search settings that produced it), so a
+cached file can be traced back and regenerated with find_order(master_seed=...).
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from .distance import DistanceTable
+from .optimize import optimize_order
+from .parallel import parallel_search
+
+OrderKey = namedtuple('OrderKey', ['stim_rows', 'stim_columns', 'min_distance', 'max_distance',
+                                   'start_pattern', 'all_stims'])
+CachedOrder = namedtuple('CachedOrder', ['order', 'min_distance', 'mean_distance', 'provenance'])
+FoundOrder = namedtuple('FoundOrder', [
+    'order',
+    'min_distance',
+    'mean_distance',
+    'source',       #'cache', 'search' or 'refined' (optimizer warm-started from the cached order)
+    'provenance',   #dict of the seed and settings that produced the order, None if unknown
+])
+
+DEFAULT_SEED = 0    #master seed of searches run without an explicit one
+
+_KEY_COLUMNS = ' AND '.join('%s = ?' % field for field in OrderKey._fields)
+
+
+def default_cache_path():     #$XDG_CACHE_HOME/polygongrid/orders.sqlite, or under ~/.cache
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'polygongrid', 'orders.sqlite')
+
+
+class OrderCache:
+
+    def __init__(self, path=None, max_entries=1000):
+        self.path = path or default_cache_path()
+        self.max_entries = max_entries
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute('''CREATE TABLE IF NOT EXISTS orders (
+            stim_rows INTEGER, stim_columns INTEGER, min_distance REAL, max_distance REAL,
+            start_pattern INTEGER, all_stims INTEGER,
+            pattern_order TEXT, min_step REAL, mean_step REAL, created REAL, last_used REAL,
+            provenance TEXT,
+            PRIMARY KEY (stim_rows, stim_columns, min_distance, max_distance, start_pattern, all_stims))''')
+        columns = [row[1] for row in self._connection.execute('PRAGMA table_info(orders)')]
+        if 'provenance' not in columns:     #caches written before provenance was recorded
+            self._connection.execute('ALTER TABLE orders ADD COLUMN provenance TEXT')
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    def get(self, key):
+        """Best CachedOrder stored for key, or None. Marks the key as recently used."""
+        row = self._connection.execute('SELECT pattern_order, min_step, mean_step, provenance FROM orders WHERE '
+                                       + _KEY_COLUMNS, tuple(key)).fetchone()
+        if row is None:
+            return None
+        with self._connection:
+            self._connection.execute('UPDATE orders SET last_used = ? WHERE ' + _KEY_COLUMNS, (time.time(),) + tuple(key))
+        return CachedOrder(json.loads(row[0]), row[1], row[2], None if row[3] is None else json.loads(row[3]))
+
+    def put(self, key, order, min_distance, mean_distance, provenance=None):
+        """
+        Store order for key, with its provenance dict, unless an order at least
+        as good by (min distance, mean distance) is already cached. Returns True
+        if it was stored.
+        """
+        cached = self.get(key)
+        if cached is not None and (cached.min_distance, cached.mean_distance) >= (min_distance, mean_distance):
+            return False
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO orders (%s, pattern_order, min_step, mean_step, created, last_used, provenance) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)' % ', '.join(OrderKey._fields),
+                tuple(key) + (json.dumps([int(i) for i in order]), float(min_distance), float(mean_distance), now, now,
+                              None if provenance is None else json.dumps(provenance)))
+        self.prune()
+        return True
+
+    def prune(self):     #drop the least recently used keys beyond max_entries
+        with self._connection:
+            self._connection.execute('DELETE FROM orders WHERE rowid NOT IN '
+                                     '(SELECT rowid FROM orders ORDER BY last_used DESC LIMIT ?)', (self.max_entries,))
+
+
+def find_order(key, cache=None, refine=False, runs=None, workers=None, master_seed=None, optimize_moves=200000,
+               target_min_distance=None, stats=None, table=None):
+    """
+    Best order for key as a FoundOrder.
+
+    Without a master_seed, a cached order is returned as is unless refine is
+    set, in which case the optimizer is warm-started from it. On a cache miss
+    (or without a cache) a parallel_search is run with the remaining
+    arguments and DEFAULT_SEED. An explicit master_seed skips the cache lookup
+    and always runs that search, so the same seed and settings give the same
+    order whatever the cache holds. New or improved orders are written back
+    to the cache with their provenance.
+
+    Returns None when the search finds no order; raises InfeasibleOrderError
+    when none exists. Cache hits and misses and the search counters go to
+    stats (a RunStats), if given. table is the DistanceTable for key, built
+    here if not given.
+    """
+    cached = None
+    if cache is not None and master_seed is None:
+        cached = cache.get(key)
+        if stats is not None:
+            stats.count('cache.hits' if cached is not None else 'cache.misses')
+    if master_seed is None:
+        master_seed = DEFAULT_SEED
+    if cached is not None and not refine:
+        return FoundOrder(cached.order, cached.min_distance, cached.mean_distance, 'cache', cached.provenance)
+    if table is None:
+        table = DistanceTable(key.stim_rows, key.stim_columns, key.min_distance, key.max_distance)
+    if cached is not None:
+        result = optimize_order(table, cached.order, time_limit=None, max_moves=optimize_moves, seed=master_seed,
+                                target_min_distance=target_min_distance)
+        if stats is not None:
+            stats.count('optimize.moves', result.moves)
+            stats.count('optimize.accepted', result.accepted)
+            stats.extend('optimize.best', result.history)
+        provenance = {'refined_from': cached.provenance, 'seed': master_seed, 'optimize_moves': optimize_moves,
+                      'target_min_distance': target_min_distance}
+        found = FoundOrder(result.order, result.min_distance, result.mean_distance, 'refined', provenance)
+    else:
+        result = parallel_search(key.stim_rows, key.stim_columns, key.min_distance, key.max_distance,
+                                 key.start_pattern, runs=runs, workers=workers, master_seed=master_seed,
+                                 optimize_moves=optimize_moves, target_min_distance=target_min_distance,
+                                 stats=stats, table=table)
+        if result.order is None:
+            return None
+        provenance = {'seed': master_seed, 'runs': runs, 'optimize_moves': optimize_moves,
+                      'target_min_distance': target_min_distance, 'run': result.run, 'run_seed': result.seed}
+        found = FoundOrder(result.order, result.min_distance, result.mean_distance, 'search', provenance)
+    if cache is not None:
+        cache.put(key, found.order, found.min_distance, found.mean_distance, found.provenance)
+    return found
@@ -0,0 +1,104 @@
+"""
+Command-line entry point: python -m polygongrid LAYOUT [LAYOUT ...]
+
+Every layout is generated in the same process, sharing the order cache and
+the precomputed grid structures.
+"""
+import argparse
+import cProfile
+import json
+import sys
+import time
+
+DEFAULT_OUTPUT = 'PolygonGrid_{rows}x{columns}_res{resolution}.txt'
+
+
+def parse_layout(text):     #'ROWSxCOLUMNS[:RESOLUTION]' -> (stim_rows, stim_columns, grid_resolution)
+    shape, _, resolution = text.partition(':')
+    try:
+        rows, columns = shape.lower().split('x')
+        layout = int(rows), int(columns), int(resolution or 3)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected ROWSxCOLUMNS[:RESOLUTION], got %r' % text)
+    if min(layout) < 1:
+        raise argparse.ArgumentTypeError('rows, columns and resolution must be >= 1, got %r' % text)
+    return layout
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m polygongrid',
+        description='Generate MightexVector1.0 stimulus grids for the Polygon400.')
+    parser.add_argument('layouts', nargs='+', type=parse_layout, metavar='ROWSxCOLUMNS[:RESOLUTION]',
+                        help='stim rows x stim columns, and spot size relative to the spacing (default 3)')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help='output file name template with {rows}, {columns} and {resolution} fields '
+                             '(default: %(default)s)')
+    parser.add_argument('--ordered', action='store_true', help='keep patterns in grid order')
+    parser.add_argument('--no-all-stims', action='store_true', help='leave out the pattern with all spots')
+    parser.add_argument('--start-pattern', type=int, help='0-indexed first pattern (default: grid middle)')
+    parser.add_argument('--min-distance', type=float, default=5)
+    parser.add_argument('--max-distance', type=float, default=40)
+    parser.add_argument('--seed', type=int,
+                        help='master seed of the order search; bypasses cached orders so that a seed always '
+                             'regenerates the same file (default: use the cache, search with seed 0)')
+    parser.add_argument('--restarts', type=int, default=8, help='independent search runs per layout')
+    parser.add_argument('--optimize-moves', type=int, default=200000, help='local search moves per run')
+    parser.add_argument('--target-min-distance', type=float,
+                        help='stop searching once an order reaches this minimum step distance')
+    parser.add_argument('--workers', type=int, default=1, help='search processes (0: all CPUs)')
+    parser.add_argument('--no-cache', action='store_true', help='ignore and do not update the order cache')
+    parser.add_argument('--refine', action='store_true', help='keep optimizing cached orders')
+    parser.add_argument('--cache-file', help='order cache location')
+    parser.add_argument('--stats', action='store_true', help='print per-stage timings and counters')
+    parser.add_argument('--stats-json', metavar='PATH', help='write timings and counters of every layout as JSON')
+    parser.add_argument('--profile', metavar='PATH', help='run under cProfile and write the statistics to PATH')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    #Imported here so that --help and argument errors stay instant
+    from .cache import OrderCache
+    from .layout import generate
+    from .ordering import OrderNotFoundError
+    from .stats import RunStats
+
+    profiler = cProfile.Profile() if args.profile else None
+    report = {}
+    cache = None if args.no_cache else OrderCache(args.cache_file)
+    status = 0
+    try:
+        for stim_rows, stim_columns, grid_resolution in args.layouts:
+            output_file = args.output.format(rows=stim_rows, columns=stim_columns, resolution=grid_resolution)
+            stats = RunStats(profile=profiler)
+            start = time.perf_counter()
+            try:
+                layout = generate(stim_rows, stim_columns, grid_resolution, output_file,
+                                  all_stims=not args.no_all_stims, separated=not args.ordered,
+                                  start_pattern=args.start_pattern, min_distance=args.min_distance,
+                                  max_distance=args.max_distance, seed=args.seed, restarts=args.restarts,
+                                  optimize_moves=args.optimize_moves, workers=args.workers or None, cache=cache,
+                                  refine=args.refine, target_min_distance=args.target_min_distance,
+                                  stats=stats)
+            except (OrderNotFoundError, IndexError, ValueError) as error:
+                print('%dx%d:%d: %s' % (stim_rows, stim_columns, grid_resolution, error), file=sys.stderr)
+                status = 1
+                continue
+            finally:
+                report[output_file] = stats.as_dict()
+            seed = '' if layout.provenance is None else ' (seed %s)' % layout.provenance.get('seed')
+            print('%s: %d patterns, order from %s%s, min distance %.3f, mean distance %.3f, %d bytes in %.2f s' % (
+                output_file, len(layout.order), layout.source, seed, layout.min_distance, layout.mean_distance,
+                layout.bytes_written, time.perf_counter() - start))
+            if args.stats:
+                print(stats.summary())
+    finally:
+        if cache is not None:
+            cache.close()
+    if args.stats_json:
+        with open(args.stats_json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+    return status
@@ -0,0 +1,115 @@
+"""
+Precomputed spot geometry for the ordering search.
+
+Spots sit on a regular stim_rows x stim_columns lattice, so the distance
+between two spots only depends on their row and column offsets. DistanceTable
+stores one distance per offset, which makes every pairwise lookup O(1) without
+storing an N x N matrix, and precomputes the offsets that fall inside the
+(min_distance, max_distance) window so each spot's feasible neighbours can be
+listed without scanning the grid.
+
+Distances are in units of spots and patterns are 0-indexed in row-major order,
+as everywhere else in the package.
+"""
+import numpy as np
+
+CONDENSED_ABOVE = 2048      #matrix() returns the condensed form above this many spots
+NEIGHBOUR_DTYPE = np.int32  #pattern numbers in neighbour lists, half the memory of the default int64
+
+
+def spot_coordinates(stim_rows, stim_columns):     #(stim_number, 2) array of 0-indexed (row, column) per pattern
+    rows, columns = np.divmod(np.arange(stim_rows*stim_columns), stim_columns)
+    return np.stack((rows, columns), axis=1)
+
+
+class DistanceTable:
+
+    def __init__(self, stim_rows, stim_columns, min_distance=0, max_distance=np.inf):
+        self.stim_rows = int(stim_rows)
+        self.stim_columns = int(stim_columns)
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.stim_number = self.stim_rows*self.stim_columns
+        self.coordinates = spot_coordinates(self.stim_rows, self.stim_columns)
+        self.offset_distance = np.hypot(*np.meshgrid(np.arange(self.stim_rows), np.arange(self.stim_columns),
+                                                     indexing='ij'))
+        #Signed (row, column) offsets whose distance lies strictly inside the window
+        row_offsets, column_offsets = np.meshgrid(np.arange(1 - self.stim_rows, self.stim_rows),
+                                                  np.arange(1 - self.stim_columns, self.stim_columns), indexing='ij')
+        window = self.in_window(np.hypot(row_offsets, column_offsets))
+        self.window_offsets = np.stack((row_offsets[window], column_offsets[window]), axis=1)
+        self._candidates = {}
+
+    def __repr__(self):
+        return 'DistanceTable(stim_rows=%d, stim_columns=%d, min_distance=%r, max_distance=%r)' % (
+            self.stim_rows, self.stim_columns, self.min_distance, self.max_distance)
+
+    def __getstate__(self):     #neighbour lists are rebuilt on demand rather than pickled to worker processes
+        state = self.__dict__.copy()
+        state['_candidates'] = {}
+        return state
+
+    def in_window(self, distance):
+        return (self.min_distance < distance) & (distance < self.max_distance)
+
+    def distance(self, pattern_number1, pattern_number2):
+        row1, column1 = divmod(pattern_number1, self.stim_columns)
+        row2, column2 = divmod(pattern_number2, self.stim_columns)
+        return self.offset_distance[abs(row1 - row2), abs(column1 - column2)]
+
+    def distances(self, pattern_numbers1, pattern_numbers2):     #vectorized distance() over arrays of patterns
+        delta = np.abs(self.coordinates[pattern_numbers1] - self.coordinates[pattern_numbers2])
+        return self.offset_distance[delta[..., 0], delta[..., 1]]
+
+    def candidates(self, pattern_number):
+        """
+        Sorted NEIGHBOUR_DTYPE array of patterns whose distance to
+        pattern_number lies strictly between min_distance and max_distance.
+        Built on first use and cached.
+        """
+        pattern_number = int(pattern_number)
+        if pattern_number not in self._candidates:
+            positions = self.coordinates[pattern_number] + self.window_offsets
+            on_grid = ((positions[:, 0] >= 0) & (positions[:, 0] < self.stim_rows)
+                       & (positions[:, 1] >= 0) & (positions[:, 1] < self.stim_columns))
+            neighbours = (positions[on_grid, 0]*self.stim_columns + positions[on_grid, 1]).astype(NEIGHBOUR_DTYPE)
+            neighbours.sort()
+            self._candidates[pattern_number] = neighbours
+        return self._candidates[pattern_number]
+
+    def condensed_index(self, pattern_number1, pattern_number2):     #index into the condensed matrix (scipy pdist layout)
+        i, j = np.minimum(pattern_number1, pattern_number2), np.maximum(pattern_number1, pattern_number2)
+        return self.stim_number*i - i*(i + 1)//2 + (j - i - 1)
+
+    def matrix(self, condensed=None, dtype=np.float32):
+        """
+        Pairwise distance matrix between all patterns, either square or in the
+        condensed upper-triangle layout of scipy.spatial.distance.pdist. By
+        default the condensed form is used for grids above CONDENSED_ABOVE spots.
+        """
+        if condensed is None:
+            condensed = self.stim_number > CONDENSED_ABOVE
+        if condensed:
+            first, second = np.triu_indices(self.stim_number, k=1)
+            return self.distances(first, second).astype(dtype)
+        return self.distances(np.arange(self.stim_number)[:, None], np.arange(self.stim_number)[None, :]).astype(dtype)
+
+    def step_distances(self, order):     #distances between adjacent patterns of an order
+        order = np.asarray(order, dtype=np.intp)
+        return self.distances(order[:-1], order[1:])
+
+    def order_stats(self, order):
+        """
+        (min, mean, step distances) of adjacent patterns in an order; min and
+        mean are 0 for orders of fewer than 2 patterns, as in optimize_order.
+        """
+        dist_vector = self.step_distances(order)
+        if dist_vector.size == 0:
+            return (0., 0., dist_vector)
+        return (dist_vector.min(), dist_vector.mean(), dist_vector)
+
+    def is_valid_order(self, order):     #every pattern exactly once and every step inside the window
+        order = np.asarray(order, dtype=np.intp)
+        return (order.size == self.stim_number
+                and np.array_equal(np.sort(order), np.arange(self.stim_number))
+                and bool(self.in_window(self.step_distances(order)).all()))
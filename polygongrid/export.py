@@ -0,0 +1,125 @@
+"""
+MightexVector1.0 file export.
+
+Patterns are streamed one at a time to a buffered binary file handle. Each
+pattern is rendered into a reusable byte buffer that already holds the row
+prefixes, separators and line endings, so only the 0/1 digits are touched per
+pattern and the full file is never held in memory.
+"""
+import os
+
+import numpy as np
+
+ZERO = ord('0')
+ONE = ord('1')
+ROW_INDENT = b'    '    #every pattern row after the first is indented by 4 spaces
+
+
+def gridposition(pattern_number, stim_columns):     #1-indexed (row, column) of a 1-indexed pattern number
+    row_position_1indexed = -(-pattern_number // stim_columns)
+    column_position_1indexed = pattern_number - (row_position_1indexed - 1)*stim_columns
+    return (row_position_1indexed, column_position_1indexed)
+
+
+def vector_header(spot_grid, min_distance=None, average_distance=None):
+    distances = '# Minimum Distance = %s, Average Distance = %s' % (
+        '' if min_distance is None else min_distance,
+        '' if average_distance is None else average_distance)
+    return '\n'.join([
+        'MightexVector1.0',
+        '# Mightex Vector file for %d x %d grid scan with space between stimuli.' % (
+            spot_grid.stim_columns, spot_grid.stim_rows),
+        distances,
+        '# Type and BitDepth',
+        'Grid',
+        '1',
+        '# Columns and Rows',
+        str(spot_grid.column_number),
+        str(spot_grid.row_number)])
+
+
+class VectorFileWriter:
+    """
+    Write a MightexVector1.0 file for a SpotGrid pattern by pattern.
+
+    newline defaults to os.linesep, which reproduces what a text-mode write of
+    the same content produces on the current platform.
+    """
+
+    def __init__(self, filename, spot_grid, newline=os.linesep, buffer_size=1 << 20,
+                 min_distance=None, average_distance=None):
+        self.spot_grid = spot_grid
+        self.newline = newline.encode('ascii')
+        self.pattern_count = 0
+        self.bytes_written = 0
+        rows, columns = spot_grid.shape
+        # Row layout: indent, digits separated by spaces, ';', newline
+        row_width = len(ROW_INDENT) + 2*columns - 1 + 1 + len(self.newline)
+        self._buffer = np.full((rows, row_width), ord(' '), dtype=np.uint8)
+        self._buffer[:, len(ROW_INDENT) + 2*columns - 1] = ord(';')
+        self._buffer[:, len(ROW_INDENT) + 2*columns:] = np.frombuffer(self.newline, dtype=np.uint8)
+        self._digits = self._buffer[:, len(ROW_INDENT)::2][:, :columns]     #view onto the digit positions
+        self._digits[...] = ZERO
+        self._file = open(filename, 'wb', buffering=buffer_size)
+        self._write(vector_header(spot_grid, min_distance, average_distance))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(self, text):
+        data = text.replace('\n', self.newline.decode('ascii')).encode('ascii')
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def _write_body(self):
+        # The first row is not indented
+        data = memoryview(self._buffer).cast('B')[len(ROW_INDENT):]
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def _write_label(self, label_number):
+        self.pattern_count += 1
+        row, column = gridposition(label_number, self.spot_grid.stim_columns)
+        self._write('\n#======== Pattern %d, Row = %d, Column = %d ========\nBin ' % (
+            self.pattern_count, row, column))
+
+    def write_spot(self, pattern_number):
+        """Write the single-spot pattern for a 0-indexed pattern number."""
+        rows, columns = self.spot_grid.spot_slices(pattern_number)
+        self._write_label(pattern_number + 1)
+        self._digits[rows, columns] = ONE
+        self._write_body()
+        self._digits[rows, columns] = ZERO
+
+    def write_frame(self, frame, label_number):
+        """Write an arbitrary 0/1 frame, labelled with a 1-indexed pattern number."""
+        frame = np.asarray(frame)
+        if frame.shape != self.spot_grid.shape:
+            raise ValueError('frame shape %s does not match grid shape %s' % (frame.shape, self.spot_grid.shape))
+        self._write_label(label_number)
+        self._digits[...] = ZERO + (frame != 0)
+        self._write_body()
+        self._digits[...] = ZERO
+
+
+def write_vector_file(filename, spot_grid, order, all_stims=False, newline=os.linesep, **header):
+    """
+    Stream the patterns of spot_grid in the given (0-indexed) order to a
+    MightexVector1.0 file, followed by the all-spots pattern if all_stims is
+    set. Returns the number of bytes written.
+    """
+    with VectorFileWriter(filename, spot_grid, newline=newline, **header) as writer:
+        for pattern_number in order:
+            writer.write_spot(pattern_number)
+        if all_stims:
+            # The all-spots pattern has always been labelled as 1-indexed
+            # pattern stim_number+2; kept so existing files stay identical.
+            writer.write_frame(spot_grid.all_spots(), spot_grid.stim_number + 2)
+    return writer.bytes_written
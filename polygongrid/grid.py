@@ -0,0 +1,134 @@
+"""
+Spot-grid construction.
+
+Each pattern is a (row_number, column_number) frame of 0s with a square of
+grid_resolution x grid_resolution 1s at the spot location. Neighbouring spots
+are separated by one line of 0s, so every spot occupies a block of
+(grid_resolution+1) pixels and the trailing blank row/column is dropped.
+
+Patterns are numbered 0-indexed in row-major order over the stim grid, the
+same numbering used by the ordering code.
+"""
+import numpy as np
+
+
+class SpotGrid:
+
+    def __init__(self, stim_rows, stim_columns, grid_resolution):
+        if stim_rows < 1 or stim_columns < 1 or grid_resolution < 1:
+            raise ValueError('stim_rows, stim_columns and grid_resolution must be >= 1')
+        self.stim_rows = int(stim_rows)
+        self.stim_columns = int(stim_columns)
+        self.grid_resolution = int(grid_resolution)
+
+    @property
+    def block_size(self):    #spot size plus the 1 blank space between spots
+        return self.grid_resolution + 1
+
+    @property
+    def row_number(self):    #The -1 avoids the unnecessary bottom 0 in each column
+        return self.block_size*self.stim_rows - 1
+
+    @property
+    def column_number(self):     #The -1 avoids the unnecessary last 0 in each row
+        return self.block_size*self.stim_columns - 1
+
+    @property
+    def stim_number(self):
+        return self.stim_rows*self.stim_columns
+
+    @property
+    def shape(self):     #shape of a single pattern frame
+        return (self.row_number, self.column_number)
+
+    def __repr__(self):
+        return 'SpotGrid(stim_rows=%d, stim_columns=%d, grid_resolution=%d)' % (
+            self.stim_rows, self.stim_columns, self.grid_resolution)
+
+    def _check_pattern(self, pattern_number):
+        pattern_number = int(pattern_number)
+        if not 0 <= pattern_number < self.stim_number:
+            raise IndexError('pattern %d out of range for %d stims' % (pattern_number, self.stim_number))
+        return pattern_number
+
+    def spot_slices(self, pattern_number):     #(row slice, column slice) of the spot for a 0-indexed pattern
+        pattern_number = self._check_pattern(pattern_number)
+        row = (pattern_number // self.stim_columns)*self.block_size
+        column = (pattern_number % self.stim_columns)*self.block_size
+        return (slice(row, row + self.grid_resolution),
+                slice(column, column + self.grid_resolution))
+
+    def spot_map(self):
+        """
+        Frame holding the 0-indexed pattern number of the spot covering each
+        pixel, or -1 for blank pixels.
+        """
+        row_block, row_offset = np.divmod(np.arange(self.row_number), self.block_size)
+        col_block, col_offset = np.divmod(np.arange(self.column_number), self.block_size)
+        spot_ids = row_block[:, None]*self.stim_columns + col_block[None, :]
+        in_spot = (row_offset < self.grid_resolution)[:, None] & (col_offset < self.grid_resolution)[None, :]
+        return np.where(in_spot, spot_ids, -1)
+
+    def all_spots(self, dtype=np.uint8):     #pattern with every spot lit
+        return (self.spot_map() >= 0).astype(dtype)
+
+    def pattern(self, pattern_number, dtype=np.uint8):     #single pattern frame, built on demand
+        frame = np.zeros(self.shape, dtype=dtype)
+        frame[self.spot_slices(pattern_number)] = 1
+        return frame
+
+    def iter_patterns(self, order=None, all_stims=False, dtype=np.uint8):
+        """
+        Yield pattern frames one at a time in the given order (default: ordered
+        grid), followed by the all-spots pattern if all_stims is set. Only one
+        frame is held in memory at a time.
+        """
+        if order is None:
+            order = range(self.stim_number)
+        frame = np.zeros(self.shape, dtype=dtype)
+        for pattern_number in order:
+            rows, columns = self.spot_slices(pattern_number)
+            frame[rows, columns] = 1
+            yield frame.copy()
+            frame[rows, columns] = 0
+        if all_stims:
+            yield self.all_spots(dtype)
+
+    def _spot_indices(self, order):     #broadcastable (pattern, row, column) pixel indices of every spot in order
+        order = np.asarray(order, dtype=np.intp)
+        if order.size and (order.min() < 0 or order.max() >= self.stim_number):
+            raise IndexError('order contains patterns out of range for %d stims' % self.stim_number)
+        row_start, column_start = np.divmod(order, self.stim_columns)
+        spot_range = np.arange(self.grid_resolution)
+        rows = row_start[:, None, None]*self.block_size + spot_range[None, :, None]
+        columns = column_start[:, None, None]*self.block_size + spot_range[None, None, :]
+        patterns = np.arange(order.size)[:, None, None]
+        return patterns, rows, columns
+
+    def stack(self, order=None, all_stims=False, packed=False):
+        """
+        Build the full (row_number, column_number, n_patterns) stack of bool
+        frames, with patterns in the given order (default: ordered grid) and an
+        optional trailing all-spots pattern. Only the spot pixels are written,
+        through one fancy-indexed assignment, instead of looping over pixels.
+
+        With packed=True the column axis is bit-packed as by np.packbits, which
+        cuts memory by 8x and never materializes the unpacked stack;
+        np.unpackbits(stack, axis=1, count=column_number) recovers the frames.
+        """
+        if order is None:
+            order = np.arange(self.stim_number)
+        patterns, rows, columns = self._spot_indices(order)
+        n_patterns = len(order) + (1 if all_stims else 0)
+        if packed:
+            stack = np.zeros((self.row_number, -(-self.column_number // 8), n_patterns), dtype=np.uint8)
+            bits = np.left_shift(1, 7 - columns % 8).astype(np.uint8)
+            np.bitwise_or.at(stack, (rows, columns // 8, patterns), bits)
+            if all_stims:
+                stack[:, :, -1] = np.packbits(self.all_spots(bool), axis=1)
+        else:
+            stack = np.zeros((self.row_number, self.column_number, n_patterns), dtype=bool)
+            stack[rows, columns, patterns] = True
+            if all_stims:
+                stack[:, :, -1] = self.all_spots(bool)
+        return stack
@@ -0,0 +1,109 @@
+"""
+One-call generation of a stimulus layout: build the grid, find a separated
+pattern order (through the order cache when one is given) and stream the
+MightexVector1.0 file.
+
+Spot grids and distance tables are memoized per parameter set and handed to
+the order search, so a process generating several layouts builds each of
+them, and each spot's neighbour list, only once. Only the most recent
+distance tables are kept, since the neighbour lists of a large grid take
+hundreds of MB.
+"""
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from .cache import OrderKey, find_order
+from .distance import DistanceTable
+from .export import write_vector_file
+from .grid import SpotGrid
+from .ordering import OrderNotFoundError
+from .stats import RunStats
+
+Layout = namedtuple('Layout', [
+    'spot_grid',
+    'order',            #0-indexed pattern order, without the all-spots pattern
+    'min_distance',     #min and mean distance between consecutive spots
+    'mean_distance',
+    'source',           #'ordered', 'cache', 'search' or 'refined'
+    'output_file',      #None if no file was written
+    'bytes_written',
+    'provenance',       #seed and search settings that produced the order, None if unknown or ordered
+])
+
+
+@lru_cache(maxsize=None)
+def spot_grid(stim_rows, stim_columns, grid_resolution):
+    return SpotGrid(stim_rows, stim_columns, grid_resolution)
+
+
+@lru_cache(maxsize=4)
+def distance_table(stim_rows, stim_columns, min_distance, max_distance):
+    return DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+
+
+def middle_pattern(stim_rows, stim_columns):     #0-indexed spot just above and left of the grid centre
+    return (max(stim_rows//2, 1) - 1)*stim_columns + max(stim_columns//2, 1) - 1
+
+
+def generate(stim_rows, stim_columns, grid_resolution, output_file=None, all_stims=True, separated=True,
+             start_pattern=None, min_distance=5, max_distance=40, seed=None, restarts=8, optimize_moves=200000,
+             workers=1, cache=None, refine=False, target_min_distance=None, stats=None):
+    """
+    Generate a stim_rows x stim_columns grid of spots of grid_resolution pixels
+    and return a Layout.
+
+    With separated set, the pattern order starts at start_pattern (default:
+    the middle of the grid) and keeps every step strictly between
+    min_distance and max_distance spots; it is taken from cache (an
+    OrderCache, optional) or found with find_order using seed, restarts,
+    optimize_moves, workers and refine, stopping early once an order reaches
+    target_min_distance, if given. An explicit seed bypasses the cached order,
+    so the same seed and settings always regenerate the same file; without
+    one the cache is used and searches run with DEFAULT_SEED. Otherwise
+    patterns are in grid order.
+    The MightexVector1.0 file is written to output_file when one is given,
+    with a trailing all-spots pattern if all_stims is set.
+
+    stats (a RunStats), if given, times the 'order' and 'export' stages and
+    collects the search, optimization and export counters. The spot grid and
+    distance table are memoized and cheap to build; the pattern frames are
+    rendered while writing, so rendering is counted under 'export'.
+
+    Raises InfeasibleOrderError when no separated order exists and
+    OrderNotFoundError when the search finds none.
+    """
+    if stats is None:
+        stats = RunStats()
+    grid = spot_grid(stim_rows, stim_columns, grid_resolution)
+    table = distance_table(stim_rows, stim_columns, min_distance, max_distance)
+    with stats.stage('order'):
+        if separated:
+            if start_pattern is None:
+                start_pattern = middle_pattern(stim_rows, stim_columns)
+            key = OrderKey(stim_rows, stim_columns, min_distance, max_distance, start_pattern, int(bool(all_stims)))
+            found = find_order(key, cache, refine=refine, runs=restarts, workers=workers, master_seed=seed,
+                               optimize_moves=optimize_moves, target_min_distance=target_min_distance,
+                               stats=stats, table=table)
+            if found is None:
+                raise OrderNotFoundError('no order found with %r < distance < %r from pattern %d in %d runs' % (
+                    min_distance, max_distance, start_pattern, restarts))
+            order, min_dist, average_dist, source, provenance = found
+        else:
+            order = list(range(grid.stim_number))
+            min_dist, average_dist, _ = table.order_stats(order)
+            source = 'ordered'
+            provenance = None
+    stats.set('order.min_distance', float(min_dist))
+    stats.set('order.mean_distance', float(average_dist))
+    bytes_written = 0
+    if output_file is not None:
+        with stats.stage('export'):
+            start = time.perf_counter()
+            bytes_written = write_vector_file(output_file, grid, order, all_stims=all_stims)
+            elapsed = time.perf_counter() - start
+        stats.count('export.bytes', bytes_written)
+        stats.count('export.patterns', len(order) + (1 if all_stims else 0))
+        stats.set('export.mb_per_s', bytes_written/1e6/elapsed if elapsed else 0.)
+    return Layout(grid, order, float(min_dist), float(average_dist), source, output_file, bytes_written,
+                  provenance)
@@ -0,0 +1,221 @@
+"""
+Local search that improves an existing order, raising first the minimum and
+then the mean distance between consecutive spots.
+
+Moves are evaluated incrementally from the few steps they change: swapping
+two spots, reversing a segment (2-opt) and relocating a segment of up to
+three spots (Or-opt). Acceptance follows simulated annealing on a penalty
+that is dominated by the shortest steps, so the search keeps pushing the
+bottleneck step up while it is allowed to wander early on. The first spot of
+the order never moves, so a chosen start pattern is preserved.
+"""
+import math
+import random as rd
+import time
+from collections import namedtuple
+
+import numpy as np
+
+OptimizeResult = namedtuple('OptimizeResult', [
+    'order',            #best order found
+    'min_distance',     #its minimum step distance
+    'mean_distance',    #its mean step distance
+    'moves',            #moves evaluated
+    'accepted',         #moves applied
+    'elapsed',          #seconds spent
+    'history',          #(elapsed, min_distance, mean_distance) each time the best order improved
+])
+
+
+def optimize_order(table, order, time_limit=5., max_moves=None, patience=None, seed=None,
+                   sharpness=16, initial_temperature=1., final_temperature=0.01, target_min_distance=None,
+                   callback=None, should_stop=None):
+    """
+    Improve order by simulated annealing and return an OptimizeResult.
+
+    The search stops after time_limit seconds, max_moves evaluated moves,
+    patience consecutive moves without a new best order, or as soon as the
+    best minimum distance reaches target_min_distance, whichever comes first.
+    The temperature falls geometrically from initial_temperature to
+    final_temperature over the time (or move) budget, and is measured in units
+    of the current shortest step's penalty. The step penalty is
+    (1/distance)**sharpness, so larger sharpness concentrates the search on
+    the shortest steps.
+
+    Steps of max_distance or more are never created, but those already in
+    order are only removed when a move happens to replace them; check the
+    result with table.is_valid_order when the input may not be valid.
+
+    A given seed reproduces the same result only with time_limit=None, since
+    a time budget (and the cooling schedule tied to it) depends on machine speed.
+
+    callback, if given, is called with the result-so-far every time the best
+    order improves. should_stop, if given, is polled every 256 moves and ends
+    the search when it returns True.
+    """
+    if time_limit is None and max_moves is None and patience is None and target_min_distance is None:
+        raise ValueError('optimize_order needs at least one stopping criterion')
+    order = [int(i) for i in order]
+    step_count = len(order) - 1
+    rng = rd.Random(seed)
+    rows = [int(r) for r in table.coordinates[:, 0]]
+    columns = [int(c) for c in table.coordinates[:, 1]]
+    offset_distance = table.offset_distance
+    #Per-offset lookups: distance, penalty, and rank among the distinct distances
+    levels, level_index = np.unique(offset_distance, return_inverse=True)
+    level_index = level_index.reshape(offset_distance.shape).tolist()
+    with np.errstate(divide='ignore'):
+        penalty_table = np.power(1/offset_distance, sharpness)
+    penalty_table[offset_distance >= table.max_distance] = np.inf
+    penalty_table = penalty_table.tolist()
+    distance_table = offset_distance.tolist()
+    level_penalty = np.power(np.maximum(levels, 1e-12), -float(sharpness)).tolist()     #scales the temperature
+    levels = levels.tolist()
+
+    def step(a, b):     #(distance, penalty, level) of the step between two patterns
+        dr = abs(rows[a] - rows[b])
+        dc = abs(columns[a] - columns[b])
+        return distance_table[dr][dc], penalty_table[dr][dc], level_index[dr][dc]
+
+    #Running totals over the steps of the current order
+    level_counts = [0]*len(levels)
+    total_distance = 0.
+    for i in range(step_count):
+        distance, _, level = step(order[i], order[i + 1])
+        level_counts[level] += 1
+        total_distance += distance
+    min_level = next((level for level, count in enumerate(level_counts) if count), 0)
+
+    def current_min():
+        return levels[min_level] if step_count else 0.
+
+    best = (current_min(), total_distance/max(step_count, 1))
+    best_order = order[:]
+    history = [(0., best[0], best[1])]
+    moves = accepted = since_best = 0
+    start = time.perf_counter()
+    elapsed = 0.
+    if step_count < 2:
+        return OptimizeResult(best_order, best[0], best[1], moves, accepted, elapsed, history)
+
+    def result():
+        return OptimizeResult(best_order[:], best[0], best[1], moves, accepted, elapsed, history[:])
+
+    last = len(order) - 1
+    cooling = math.log(final_temperature/initial_temperature)
+    temperature = initial_temperature
+    while True:
+        if moves % 256 == 0:
+            elapsed = time.perf_counter() - start
+            if time_limit is not None:
+                if elapsed >= time_limit:
+                    break
+                progress = elapsed/time_limit
+            else:
+                progress = moves/max_moves if max_moves else 0.
+            temperature = initial_temperature*math.exp(cooling*min(progress, 1.))
+            if should_stop is not None and should_stop():
+                break
+        if max_moves is not None and moves >= max_moves:
+            break
+        if patience is not None and since_best >= patience:
+            break
+        if target_min_distance is not None and best[0] >= target_min_distance:
+            break
+        moves += 1
+        since_best += 1
+
+        #Pick a move and list the steps (as pattern pairs) it removes and adds
+        move = rng.random()
+        if move < 0.4:      #2-opt: reverse order[i..j]
+            i = rng.randint(1, last - 1)
+            j = rng.randint(i + 1, last)
+            removed = [(order[i - 1], order[i])]
+            added = [(order[i - 1], order[j])]
+            if j < last:
+                removed.append((order[j], order[j + 1]))
+                added.append((order[i], order[j + 1]))
+        elif move < 0.7:    #swap order[i] and order[j]
+            i = rng.randint(1, last - 1)
+            j = rng.randint(i + 1, last)
+            a, b = order[i], order[j]
+            if j == i + 1:
+                removed = [(order[i - 1], a), (a, b)]
+                added = [(order[i - 1], b), (b, a)]
+            else:
+                removed = [(order[i - 1], a), (a, order[i + 1]), (order[j - 1], b)]
+                added = [(order[i - 1], b), (b, order[i + 1]), (order[j - 1], a)]
+            if j < last:
+                removed.append((b, order[j + 1]))
+                added.append((a, order[j + 1]))
+        else:               #Or-opt: move order[i..i+length-1] in front of order[k], possibly reversed
+            length = rng.randint(1, 3)
+            if last - length < 1:
+                continue
+            i = rng.randint(1, last - length + 1)
+            end = i + length - 1
+            k = rng.randint(1, last + 1)      #k == last+1 appends at the end
+            if i <= k <= end + 1:
+                continue
+            first, tail = order[i], order[end]
+            if rng.random() < 0.5:
+                first, tail = tail, first
+            removed = [(order[i - 1], order[i])]
+            added = []
+            if end < last:
+                removed.append((order[end], order[end + 1]))
+                added.append((order[i - 1], order[end + 1]))
+            added.append((order[k - 1], first))
+            if k <= last:
+                removed.append((order[k - 1], order[k]))
+                added.append((tail, order[k]))
+
+        removed_steps = [step(a, b) for a, b in removed]
+        added_steps = [step(a, b) for a, b in added]
+        if any(s[1] == math.inf for s in added_steps):
+            continue        #never create a step of max_distance or more, even in place of another one
+        delta = sum(s[1] for s in added_steps) - sum(s[1] for s in removed_steps)
+        if delta > 0:
+            if rng.random() >= math.exp(-delta/(level_penalty[min_level]*temperature)):
+                continue
+
+        #Apply the move
+        if move < 0.4:
+            order[i:j + 1] = order[i:j + 1][::-1]
+        elif move < 0.7:
+            order[i], order[j] = order[j], order[i]
+        else:
+            segment = order[i:end + 1]
+            if segment[0] != first:
+                segment.reverse()
+            if k > end:
+                order[k:k] = segment
+                del order[i:end + 1]
+            else:
+                del order[i:end + 1]
+                order[k:k] = segment
+        accepted += 1
+        for distance, _, level in removed_steps:
+            level_counts[level] -= 1
+            total_distance -= distance
+        for distance, _, level in added_steps:
+            level_counts[level] += 1
+            total_distance += distance
+            if level < min_level:
+                min_level = level
+        while not level_counts[min_level]:
+            min_level += 1
+
+        candidate = (levels[min_level], total_distance/step_count)
+        if candidate > best:
+            best = candidate
+            best_order = order[:]
+            since_best = 0
+            elapsed = time.perf_counter() - start
+            history.append((elapsed, best[0], best[1]))
+            if callback is not None:
+                callback(result())
+
+    elapsed = time.perf_counter() - start
+    return result()
+
@@ -0,0 +1,124 @@
+"""
+Search for pattern orders in which every step between consecutive spots lies
+strictly inside the (min_distance, max_distance) window of a DistanceTable.
+"""
+import numpy as np
+
+
+class OrderNotFoundError(RuntimeError):
+    """No valid order was found within the search budget."""
+
+
+class InfeasibleOrderError(OrderNotFoundError):
+    """No valid order exists for the grid, window and start pattern."""
+
+
+def check_feasibility(table, start_pattern):
+    """
+    Raise InfeasibleOrderError when the feasible-neighbour graph rules out any
+    valid order: an isolated or unreachable spot, or more dead-end spots
+    (only one feasible neighbour) than a path has ends. Returns the number of
+    feasible neighbours of every pattern.
+    """
+    if not 0 <= start_pattern < table.stim_number:
+        raise IndexError('start pattern %d out of range for %d stims' % (start_pattern, table.stim_number))
+    degree = np.array([table.candidates(i).size for i in range(table.stim_number)])
+    if table.stim_number == 1:
+        return degree
+    if (degree == 0).any():
+        raise InfeasibleOrderError('pattern %d has no neighbour with %r < distance < %r' % (
+            int(np.argmax(degree == 0)), table.min_distance, table.max_distance))
+    reached = np.zeros(table.stim_number, dtype=bool)
+    reached[start_pattern] = True
+    frontier = [start_pattern]
+    while frontier:
+        neighbours = np.concatenate([table.candidates(i) for i in frontier])
+        neighbours = np.unique(neighbours[~reached[neighbours]])
+        reached[neighbours] = True
+        frontier = list(neighbours)
+    if not reached.all():
+        raise InfeasibleOrderError('%d patterns cannot be reached from pattern %d with %r < distance < %r' % (
+            int((~reached).sum()), start_pattern, table.min_distance, table.max_distance))
+    dead_ends = np.flatnonzero(degree == 1)
+    dead_ends = dead_ends[dead_ends != start_pattern]
+    if dead_ends.size > 1:
+        raise InfeasibleOrderError('patterns %s each have a single feasible neighbour but only one can end the order' % (
+            ', '.join(str(i) for i in dead_ends[:10])))
+    return degree
+
+
+def warnsdorff_order(table, start_pattern, seed=None, restarts=20, max_backtracks=None, stats=None):
+    """
+    Constructive search for an order visiting every pattern once with every
+    step inside the distance window (a Hamiltonian path over the feasible-
+    neighbour graph).
+
+    From the current spot the next spot is the unused feasible neighbour with
+    the fewest unused feasible neighbours of its own (Warnsdorff's rule),
+    breaking ties by the largest step distance and then at random from seed.
+    Dead ends are undone by depth-first backtracking; a branch is pruned as
+    soon as it strands an unused spot. After max_backtracks (default: the
+    number of patterns) the search restarts with fresh random tie-breaks.
+
+    The result is deterministic for a given seed. Raises InfeasibleOrderError
+    when the graph provably has no valid order and OrderNotFoundError when the
+    budget runs out. Restarts and backtracks are counted in stats (a RunStats),
+    if given.
+    """
+    start_pattern = int(start_pattern)
+    initial_degree = check_feasibility(table, start_pattern)
+    stim_number = table.stim_number
+    if max_backtracks is None:
+        max_backtracks = stim_number
+    rng = np.random.default_rng(seed)
+
+    for restart in range(restarts):
+        if stats is not None:
+            stats.count('order.attempts')
+            if restart:
+                stats.count('order.restarts')
+        degree = initial_degree.copy()
+        unused = np.ones(stim_number, dtype=bool)
+        order = []
+        branches = []      #untried next spots at each depth, best first
+        backtracks = 0
+
+        def visit(pattern_number):
+            order.append(pattern_number)
+            unused[pattern_number] = False
+            neighbours = table.candidates(pattern_number)
+            degree[neighbours] -= 1
+            neighbours = neighbours[unused[neighbours]]
+            if neighbours.size == 0:
+                return []
+            #An unused neighbour left without unused neighbours can only be the last spot
+            if len(order) < stim_number - 1 and (degree[neighbours] == 0).any():
+                return None
+            ranking = np.lexsort((rng.random(neighbours.size), -table.distances(pattern_number, neighbours),
+                                  degree[neighbours]))
+            return list(neighbours[ranking][::-1])
+
+        def leave():
+            pattern_number = order.pop()
+            unused[pattern_number] = True
+            degree[table.candidates(pattern_number)] += 1
+
+        branch = visit(start_pattern)
+        while len(order) < stim_number:
+            if branch:
+                branches.append(branch)
+                branch = visit(int(branch.pop()))
+                continue
+            #Dead end: step back to the deepest spot with an untried alternative
+            backtracks += 1
+            if stats is not None:
+                stats.count('order.backtracks')
+            if backtracks > max_backtracks or not branches:
+                break
+            leave()
+            branch = branches.pop()
+        if len(order) == stim_number:
+            return order
+
+    raise OrderNotFoundError('no order found with %r < distance < %r from pattern %d after %d restarts' % (
+        table.min_distance, table.max_distance, start_pattern, restarts))
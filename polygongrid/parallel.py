@@ -0,0 +1,162 @@
+"""
+Independent seeded search runs (construct an order, then optimize it) fanned
+out over a process pool, keeping the best order by (min distance, mean
+distance).
+
+Every run gets its own seed derived from a master seed, and optimization runs
+on a move budget rather than a time budget, so a master seed always gives the
+same result whatever the number of workers or the machine speed.
+"""
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .distance import DistanceTable
+from .optimize import optimize_order
+from .ordering import InfeasibleOrderError, OrderNotFoundError, warnsdorff_order
+from .stats import RunStats
+
+SearchResult = namedtuple('SearchResult', [
+    'order',            #best order, or None if every run failed
+    'min_distance',
+    'mean_distance',
+    'run',              #index of the run that produced it
+    'seed',             #seed of that run, to reproduce it on its own
+    'runs_completed',   #runs that contributed to the result
+    'runs_failed',      #runs whose construction found no order
+])
+
+_worker_table = None    #DistanceTable of the search, sent once to each worker process
+_stop_at = None         #shared index from which runs are no longer needed, set in worker processes
+
+
+def _init_worker(table, stop_at):
+    global _worker_table, _stop_at
+    _worker_table = table
+    _stop_at = stop_at
+
+
+def _worker_search_run(*args):
+    return search_run(_worker_table, *args)
+
+
+def run_seeds(master_seed, runs):     #per-run seeds derived from the master seed
+    return [int(sequence.generate_state(1)[0]) for sequence in np.random.SeedSequence(master_seed).spawn(runs)]
+
+
+def search_run(table, start_pattern, seed, optimize_moves, target_min_distance, run=0):
+    """
+    One search run over a DistanceTable: warnsdorff_order then optimize_order
+    with the same seed.
+    Returns ((min distance, mean distance, order) or None if no order was
+    found, RunStats.as_dict() of the run). In a worker process the run is cut
+    short once an earlier run has reached the target, since its result will
+    be discarded.
+    """
+    stats = RunStats()
+    try:
+        with stats.stage('search.construct'):
+            order = warnsdorff_order(table, start_pattern, seed=seed, stats=stats)
+    except InfeasibleOrderError:
+        raise       #no seed can succeed, so fail the whole search
+    except OrderNotFoundError:
+        return None, stats.as_dict()
+    if optimize_moves:
+        should_stop = None
+        if _stop_at is not None:
+            should_stop = lambda: run >= _stop_at.value
+        with stats.stage('search.optimize'):
+            result = optimize_order(table, order, time_limit=None, max_moves=optimize_moves, seed=seed,
+                                    target_min_distance=target_min_distance, should_stop=should_stop)
+        stats.count('optimize.moves', result.moves)
+        stats.count('optimize.accepted', result.accepted)
+        stats.extend('optimize.best', result.history)
+        return (result.min_distance, result.mean_distance, result.order), stats.as_dict()
+    min_dist, average_dist, _ = table.order_stats(order)
+    return (float(min_dist), float(average_dist), order), stats.as_dict()
+
+
+def parallel_search(stim_rows, stim_columns, min_distance, max_distance, start_pattern, runs=None,
+                    workers=None, master_seed=0, optimize_moves=200000, target_min_distance=None, stats=None,
+                    table=None):
+    """
+    Run `runs` independent searches (default: one per worker) on up to
+    `workers` processes (default: all CPUs; 1 runs in this process) and
+    return a SearchResult for the best order by (min distance, mean distance).
+
+    With target_min_distance, every run stops optimizing once it reaches the
+    target, and the search stops at the lowest-indexed run that reaches it:
+    runs after it are cancelled and the best of the runs up to it is
+    returned, which keeps the result independent of scheduling.
+
+    stats (a RunStats), if given, receives the summed stages and counters of
+    the runs used plus search.* run counters, and the optimizer's best
+    distances over time for the winning run as the 'optimize.best' series.
+
+    table is the DistanceTable for these grid parameters, built here if not
+    given; passing one lets successive searches share its neighbour lists.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if runs is None:
+        runs = workers
+    if table is None:
+        table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+    seeds = run_seeds(master_seed, runs)
+    results = {}
+    stop_at = runs      #runs from this index on are not needed
+
+    def reached(result):
+        found = result[0]
+        return found is not None and target_min_distance is not None and found[0] >= target_min_distance
+
+    if workers == 1:
+        for run, seed in enumerate(seeds):
+            results[run] = search_run(table, start_pattern, seed, optimize_moves, target_min_distance)
+            if reached(results[run]):
+                stop_at = run + 1
+                break
+    else:
+        shared_stop_at = multiprocessing.Value('i', runs)
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(table, shared_stop_at))
+        pending = {executor.submit(_worker_search_run, start_pattern, seed, optimize_moves, target_min_distance,
+                                   run): run for run, seed in enumerate(seeds)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = pending.pop(future, None)
+                    if run is None:
+                        continue        #a later run, already dropped after an earlier run reached the target
+                    results[run] = future.result()
+                    if reached(results[run]) and run < stop_at:
+                        stop_at = shared_stop_at.value = run + 1
+                        for other, other_run in list(pending.items()):
+                            if other_run >= stop_at:
+                                other.cancel()
+                                del pending[other]
+                if all(run in results for run in range(stop_at)):
+                    break
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    used = [run for run in range(stop_at) if run in results]
+    found = [run for run in used if results[run][0] is not None]
+    if stats is not None:
+        stats.count('search.runs', len(used))
+        stats.count('search.runs_failed', len(used) - len(found))
+        stats.count('search.runs_cancelled', runs - len(used))
+        for run in used:
+            stats.merge(results[run][1], series=False)
+    if not found:
+        return SearchResult(None, None, None, None, None, len(used), len(used))
+    #Best by (min, mean); the lowest run index wins ties
+    best = max(found, key=lambda run: (results[run][0][0], results[run][0][1], -run))
+    min_dist, average_dist, order = results[best][0]
+    if stats is not None:
+        stats.extend('optimize.best', results[best][1]['series'].get('optimize.best', []))
+    return SearchResult(order, min_dist, average_dist, best, seeds[best], len(used), len(used) - len(found))
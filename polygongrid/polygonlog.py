@@ -0,0 +1,73 @@
+"""
+Parsing of the run logs written by the Polygon400 software.
+
+Each log line is a row of whitespace-separated integers, one per pattern
+shown. Column 1 holds the number of columns of the pattern matrix and
+column 3 the 1-indexed position of the spot (its top-left pixel, counted
+row by row) in that matrix.
+"""
+import glob
+import os
+
+import numpy as np
+
+COLUMNS_FIELD = 1
+POSITION_FIELD = 3
+
+
+def matrixpos_to_gridpos(matrix_positions, output_columns, stim_columns, block_size=None, stim_rows=None):
+    """
+    Convert 1-indexed matrix positions to 0-indexed ordered pattern numbers.
+
+    block_size is the spot size plus its blank spacing in pixels. By default
+    it is derived from the matrix width: grids written by this package are
+    block_size*stim_columns - 1 pixels wide, and other widths fall back to
+    ceil(output_columns/stim_columns).
+
+    Raises ValueError if a position is not the top-left pixel of a spot or
+    falls outside the stim_rows x stim_columns grid (stim_rows, if given),
+    which is what a wrong stim_columns or block size gives.
+    """
+    output_columns = int(output_columns)
+    if block_size is None:
+        if (output_columns + 1) % stim_columns == 0:
+            block_size = (output_columns + 1) // stim_columns
+        else:
+            block_size = -(-output_columns // stim_columns)
+    pixel_rows, pixel_columns = np.divmod(np.asarray(matrix_positions) - 1, output_columns)
+    if np.any(pixel_rows % block_size) or np.any(pixel_columns % block_size):
+        raise ValueError('positions are not spot top-left pixels for %d stim columns with a block size of %d: '
+                         'check stim_columns and grid_resolution' % (stim_columns, block_size))
+    rows, columns = pixel_rows // block_size, pixel_columns // block_size
+    if np.any(rows < 0) or np.any(columns >= stim_columns) or (stim_rows is not None and np.any(rows >= stim_rows)):
+        raise ValueError('positions fall outside a %s x %d grid with a block size of %d: '
+                         'check stim_rows, stim_columns and grid_resolution' % (
+                             '?' if stim_rows is None else stim_rows, stim_columns, block_size))
+    return rows*stim_columns + columns
+
+
+def gridpos_to_matrixpos(grid_positions, spot_grid):     #1-indexed top-left matrix position of each pattern's spot
+    rows, columns = np.divmod(np.asarray(grid_positions), spot_grid.stim_columns)
+    return rows*spot_grid.block_size*spot_grid.column_number + columns*spot_grid.block_size + 1
+
+
+def read_order(polygon_output, stim_rows, stim_columns, grid_resolution=None):
+    """
+    0-indexed pattern order shown in a Polygon400 run log of a stim_rows x
+    stim_columns grid, read in one pass.
+    grid_resolution is only needed for logs of grids not written by this
+    package, whose block size cannot be derived from the matrix width (see
+    matrixpos_to_gridpos). Raises ValueError if the log does not match the
+    grid.
+    """
+    log = np.loadtxt(polygon_output, dtype=np.int64, usecols=(COLUMNS_FIELD, POSITION_FIELD), ndmin=2)
+    if log.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    block_size = None if grid_resolution is None else grid_resolution + 1
+    return matrixpos_to_gridpos(log[:, 1], log[0, 0], stim_columns, block_size, stim_rows)
+
+
+def read_orders(directory, stim_rows, stim_columns, pattern='*.txt', grid_resolution=None):
+    """Orders of every run log matching pattern in directory, by file name."""
+    return {os.path.basename(path): read_order(path, stim_rows, stim_columns, grid_resolution)
+            for path in sorted(glob.glob(os.path.join(directory, pattern)))}
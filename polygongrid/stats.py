@@ -0,0 +1,100 @@
+"""
+Timings and counters for a generation run.
+
+A RunStats object is passed down through generate() and the search
+functions. Stages are timed with `with stats.stage(name):` and accumulate
+across calls; counters are plain numbers keyed by dotted names
+('order.backtracks', 'export.bytes', ...); series hold lists of points such
+as the best (elapsed, min distance, mean distance) of the optimizer over
+time. The whole object serializes to a JSON report.
+
+With profile=True every timed stage also runs under cProfile; passing a
+cProfile.Profile instead shares one profiler between several RunStats. Only
+the calling process is profiled, so search runs in worker processes show up as
+waiting time.
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+
+
+class RunStats:
+
+    def __init__(self, profile=False):
+        self.stages = {}        #stage name -> seconds
+        self.counters = {}      #counter name -> number
+        self.series = {}        #series name -> list of points
+        if profile is True:
+            profile = cProfile.Profile()
+        self.profiler = profile or None
+        self._profiling = 0
+
+    def __repr__(self):
+        return 'RunStats(%s)' % ', '.join('%s=%.3fs' % item for item in self.stages.items())
+
+    @contextmanager
+    def stage(self, name):
+        if self.profiler is not None and not self._profiling:
+            self.profiler.enable()
+        self._profiling += 1
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages[name] = self.stages.get(name, 0.) + time.perf_counter() - start
+            self._profiling -= 1
+            if self.profiler is not None and not self._profiling:
+                self.profiler.disable()
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        self.counters[name] = value
+
+    def extend(self, name, points):
+        self.series.setdefault(name, []).extend(tuple(point) for point in points)
+
+    def merge(self, other, series=True):
+        """Add the stages and counters (and optionally series) of another RunStats or its as_dict()."""
+        if isinstance(other, RunStats):
+            other = other.as_dict()
+        for name, seconds in other.get('stages', {}).items():
+            self.stages[name] = self.stages.get(name, 0.) + seconds
+        for name, value in other.get('counters', {}).items():
+            self.count(name, value)
+        if series:
+            for name, points in other.get('series', {}).items():
+                self.extend(name, points)
+
+    def as_dict(self):
+        return {'stages': dict(self.stages), 'counters': dict(self.counters),
+                'series': {name: [list(point) for point in points] for name, points in self.series.items()}}
+
+    def to_json(self, path=None, indent=2):     #JSON report, also written to path if given
+        report = json.dumps(self.as_dict(), indent=indent)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(report + '\n')
+        return report
+
+    def summary(self):     #one line per stage and counter
+        lines = ['%-24s %10.3f s' % (name, seconds) for name, seconds in self.stages.items()]
+        lines += ['%-24s %12s' % (name, '%.6g' % value if isinstance(value, float) else value)
+                  for name, value in sorted(self.counters.items())]
+        return '\n'.join(lines)
+
+    def profile_report(self, sort='cumulative', limit=25):     #text of the cProfile statistics
+        if self.profiler is None:
+            raise ValueError('RunStats was created without profile=True')
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump_profile(self, path):     #cProfile statistics for pstats / snakeviz
+        if self.profiler is None:
+            raise ValueError('RunStats was created without profile=True')
+        self.profiler.dump_stats(path)
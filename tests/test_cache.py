@@ -0,0 +1,37 @@
+from polygongrid import OrderCache, OrderKey, find_order, generate
+
+KEY = OrderKey(12, 6, 2, 40, 0, 1)
+SEARCH = dict(runs=2, workers=1, optimize_moves=3000)
+
+
+def test_cached_order_returned_with_provenance(tmp_path):
+    with OrderCache(str(tmp_path / 'orders.sqlite')) as cache:
+        searched = find_order(KEY, cache, **SEARCH)
+        cached = find_order(KEY, cache, **SEARCH)
+    assert searched.source == 'search'
+    assert cached.source == 'cache'
+    assert cached.order == searched.order
+    assert cached.provenance == searched.provenance
+    assert cached.provenance['seed'] == 0
+
+
+def test_explicit_seed_bypasses_cache(tmp_path):
+    uncached = find_order(KEY, None, master_seed=5, **SEARCH)
+    with OrderCache(str(tmp_path / 'orders.sqlite')) as cache:
+        cache.put(KEY, list(reversed(uncached.order)), 99., 99., {'seed': 1})
+        seeded = find_order(KEY, cache, master_seed=5, **SEARCH)
+    assert seeded.source == 'search'
+    assert seeded.order == uncached.order
+    assert seeded.provenance['seed'] == 5
+
+
+def test_generate_same_seed_same_file(tmp_path):
+    with OrderCache(str(tmp_path / 'orders.sqlite')) as cache:
+        first = generate(12, 6, 2, str(tmp_path / 'a.txt'), min_distance=2, seed=3, restarts=2,
+                         optimize_moves=3000, cache=cache)
+        generate(12, 6, 2, str(tmp_path / 'b.txt'), min_distance=2, seed=4, restarts=2, optimize_moves=3000,
+                 cache=cache)
+        again = generate(12, 6, 2, str(tmp_path / 'c.txt'), min_distance=2, seed=3, restarts=2,
+                         optimize_moves=3000, cache=cache)
+    assert again.order == first.order
+    assert (tmp_path / 'a.txt').read_bytes() == (tmp_path / 'c.txt').read_bytes()
@@ -0,0 +1,22 @@
+import pytest
+
+from polygongrid.cli import main
+
+FAST = ['--no-cache', '--restarts', '1', '--optimize-moves', '500', '--min-distance', '2']
+
+
+@pytest.mark.parametrize('layout', ['0x5', '4x0', '4x5:0', '4x', 'axb'])
+def test_invalid_layout_is_a_usage_error(layout, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([layout])
+    assert exit_info.value.code == 2
+    assert repr(layout) in capsys.readouterr().err
+
+
+def test_bad_start_pattern_is_reported_per_layout(tmp_path, capsys):
+    output = str(tmp_path / 'grid_{rows}x{columns}.txt')
+    status = main(['6x5:1', '6x4:1', '--start-pattern', '27', '-o', output] + FAST)
+    assert status == 1
+    assert 'out of range' in capsys.readouterr().err
+    assert (tmp_path / 'grid_6x5.txt').exists()         #27 < 30 spots
+    assert not (tmp_path / 'grid_6x4.txt').exists()     #27 >= 24 spots
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from polygongrid import SpotGrid
+from polygongrid.export import write_vector_file
+
+
+def legacy_vector_file(filename, stim_rows, stim_columns, grid_resolution, order, all_stims):
+    #The original script's grid loops and gridstring export, with the 12 x 24 header generalized
+    def ordered_gridposition(pattern_number):
+        row_position_1indexed = math.ceil(pattern_number/stim_columns)
+        return (row_position_1indexed, pattern_number - (row_position_1indexed - 1)*stim_columns)
+
+    grid_block_size = grid_resolution + 1
+    row_number = grid_block_size*stim_rows - 1
+    column_number = grid_block_size*stim_columns - 1
+    stim_number = stim_rows*stim_columns
+    ordered_grid = np.zeros([row_number, column_number, stim_number + (1 if all_stims else 0)], dtype=int)
+    pattern_number = 0
+    for row in np.arange(0, row_number, grid_block_size):
+        for column in np.arange(0, column_number, grid_block_size):
+            for r in range(grid_resolution):
+                for c in range(grid_resolution):
+                    ordered_grid[row + r, column + c, pattern_number] = 1
+            pattern_number += 1
+    order = list(order)
+    newgrid = np.zeros(ordered_grid.shape, dtype=int)
+    for counter, i in enumerate(order):
+        newgrid[:, :, counter] = ordered_grid[:, :, i]
+    if all_stims:
+        order.append(stim_number + 1)
+        for i in range(stim_number):
+            newgrid[:, :, -1] += newgrid[:, :, i]
+
+    gridstring = '''MightexVector1.0
+# Mightex Vector file for %d x %d grid scan with space between stimuli.
+# Minimum Distance = , Average Distance = 
+# Type and BitDepth
+Grid
+1
+# Columns and Rows\n''' % (stim_columns, stim_rows) + str(column_number) + '\n' + str(row_number)
+    for pattern in range(len(newgrid[0, 0, :])):
+        gridstring += ('\n#======== Pattern ' + str(pattern + 1) + ', Row = '
+                       + str(ordered_gridposition(order[pattern] + 1)[0])
+                       + ', Column = ' + str(ordered_gridposition(order[pattern] + 1)[1]) + ' ========\n')
+        gridstring += 'Bin '
+        patternstring = ''
+        for i in range(len(newgrid[:, 0, 0])):
+            rowstring = ' '.join(str(e) + '' for e in newgrid[i, :, pattern])
+            if i > 0:
+                patternstring += '    ' + rowstring + ';\n'
+            else:
+                patternstring += rowstring + ';\n'
+        gridstring += patternstring
+    with open(filename, 'w') as f:
+        f.write(gridstring)
+
+
+@pytest.mark.parametrize('all_stims', [False, True])
+@pytest.mark.parametrize('stim_rows, stim_columns, grid_resolution', [(4, 3, 1), (4, 3, 2), (3, 5, 3), (24, 12, 1)])
+def test_matches_legacy_export_byte_for_byte(tmp_path, stim_rows, stim_columns, grid_resolution, all_stims):
+    grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+    order = np.random.default_rng(grid.stim_number).permutation(grid.stim_number).tolist()
+    legacy_vector_file(tmp_path / 'legacy.txt', stim_rows, stim_columns, grid_resolution, order, all_stims)
+    bytes_written = write_vector_file(tmp_path / 'new.txt', grid, order, all_stims=all_stims)
+    legacy = (tmp_path / 'legacy.txt').read_bytes()
+    assert (tmp_path / 'new.txt').read_bytes() == legacy
+    assert bytes_written == len(legacy)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from polygongrid import SpotGrid
+
+
+def legacy_stack(stim_rows, stim_columns, grid_resolution, order, all_stims):
+    #The original script's grid loop, reorder() and all-stims sum
+    grid_block_size = grid_resolution + 1
+    row_number = grid_block_size*stim_rows - 1
+    column_number = grid_block_size*stim_columns - 1
+    stim_number = stim_rows*stim_columns
+    ordered_grid = np.zeros([row_number, column_number, stim_number + (1 if all_stims else 0)], dtype=int)
+    pattern_number = 0
+    for row in np.arange(0, row_number, grid_block_size):
+        for column in np.arange(0, column_number, grid_block_size):
+            for r in range(grid_resolution):
+                for c in range(grid_resolution):
+                    ordered_grid[row + r, column + c, pattern_number] = 1
+            pattern_number += 1
+    newgrid = np.zeros(ordered_grid.shape, dtype=int)
+    for counter, i in enumerate(order):
+        newgrid[:, :, counter] = ordered_grid[:, :, i]
+    if all_stims:
+        for i in range(stim_number):
+            newgrid[:, :, -1] += newgrid[:, :, i]
+    return newgrid
+
+
+SHAPES = [(24, 12, 1), (4, 3, 2), (3, 5, 3), (1, 6, 4), (5, 1, 2)]
+
+
+@pytest.mark.parametrize('all_stims', [False, True])
+@pytest.mark.parametrize('stim_rows, stim_columns, grid_resolution', SHAPES)
+def test_matches_legacy_loop(stim_rows, stim_columns, grid_resolution, all_stims):
+    grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+    order = np.random.default_rng(grid.stim_number).permutation(grid.stim_number)
+    legacy = legacy_stack(stim_rows, stim_columns, grid_resolution, order, all_stims)
+
+    stack = grid.stack(order, all_stims=all_stims)
+    assert stack.dtype == bool
+    assert np.array_equal(stack, legacy)
+
+    packed = grid.stack(order, all_stims=all_stims, packed=True)
+    assert np.array_equal(np.unpackbits(packed, axis=1, count=grid.column_number), legacy)
+
+    frames = list(grid.iter_patterns(order, all_stims=all_stims))
+    assert len(frames) == legacy.shape[2]
+    assert np.array_equal(np.stack(frames, axis=2), legacy)
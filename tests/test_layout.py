@@ -0,0 +1,27 @@
+from polygongrid import generate
+from polygongrid.layout import distance_table
+
+
+def test_search_uses_memoized_distance_table(tmp_path):
+    table = distance_table(10, 8, 3, 40)
+    table._candidates.clear()
+    generate(10, 8, 2, min_distance=3, seed=1, restarts=1, optimize_moves=1000)
+    assert table._candidates        #neighbour lists were built on the shared table
+    assert distance_table(10, 8, 3, 40) is table
+
+
+def test_parallel_generate_matches_serial():
+    kwargs = dict(min_distance=3, seed=2, restarts=3, optimize_moves=2000)
+    assert generate(10, 8, 2, workers=2, **kwargs).order == generate(10, 8, 2, workers=1, **kwargs).order
+
+
+def test_distance_table_memo_is_bounded():
+    table = distance_table(3, 3, 1, 40)
+    for columns in range(4, 4 + distance_table.cache_info().maxsize):
+        distance_table(3, columns, 1, 40)
+    assert distance_table(3, 3, 1, 40) is not table
+
+
+def test_single_pattern_layout():
+    layout = generate(1, 1, 3, separated=False)
+    assert (layout.order, layout.min_distance, layout.mean_distance) == ([0], 0., 0.)
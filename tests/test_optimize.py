@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from polygongrid import DistanceTable, optimize_order, warnsdorff_order
+
+CASES = [(6, 8, 2.5, 6), (10, 10, 3, 8), (5, 7, 1.5, 40)]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('stim_rows, stim_columns, min_distance, max_distance', CASES)
+def test_result_is_a_valid_order_with_exact_stats(stim_rows, stim_columns, min_distance, max_distance, seed):
+    table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+    order = warnsdorff_order(table, 3, seed=seed)
+    result = optimize_order(table, order, time_limit=None, max_moves=5000, seed=seed)
+    assert sorted(result.order) == list(range(table.stim_number))
+    assert result.order[0] == order[0]
+    assert table.is_valid_order(result.order)
+    min_dist, average_dist, _ = table.order_stats(result.order)
+    assert result.min_distance == pytest.approx(min_dist)
+    assert result.mean_distance == pytest.approx(average_dist)
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, min_distance, max_distance', CASES)
+def test_move_budget_is_deterministic_for_a_seed(stim_rows, stim_columns, min_distance, max_distance):
+    table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+    order = warnsdorff_order(table, 0, seed=0)
+    first = optimize_order(table, order, time_limit=None, max_moves=3000, seed=5)
+    second = optimize_order(table, order, time_limit=None, max_moves=3000, seed=5)
+    assert first.order == second.order
+    assert (first.min_distance, first.mean_distance, first.accepted) == (
+        second.min_distance, second.mean_distance, second.accepted)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_never_adds_steps_outside_the_window(seed):
+    #A shuffled order has many steps of max_distance or more; moves may remove them but never add one
+    table = DistanceTable(8, 8, 1, 4)
+    order = np.random.default_rng(seed).permutation(table.stim_number).tolist()
+    long_steps = (table.step_distances(order) >= table.max_distance).sum()
+    result = optimize_order(table, order, time_limit=None, max_moves=5000, seed=seed)
+    assert sorted(result.order) == list(range(table.stim_number))
+    assert (table.step_distances(result.order) >= table.max_distance).sum() <= long_steps
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from polygongrid import DistanceTable, InfeasibleOrderError, warnsdorff_order
+from polygongrid.ordering import check_feasibility
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, min_distance, max_distance, start_pattern', [
+    (24, 12, 5, 40, 137), (10, 10, 3, 8, 0), (6, 8, 2.5, 6, 20)])
+def test_warnsdorff_order_is_valid(stim_rows, stim_columns, min_distance, max_distance, start_pattern):
+    table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+    order = warnsdorff_order(table, start_pattern, seed=3)
+    assert order[0] == start_pattern
+    assert table.is_valid_order(order)
+
+
+def test_warnsdorff_order_is_deterministic_for_a_seed():
+    table = DistanceTable(24, 12, 5, 40)
+    assert warnsdorff_order(table, 137, seed=7) == warnsdorff_order(table, 137, seed=7)
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, min_distance, max_distance, reason', [
+    (2, 2, 5, 40, 'has no neighbour'),                  #isolated spots
+    (1, 4, 1.5, 2.5, 'cannot be reached'),              #{0, 2} and {1, 3} are separate components
+    (1, 4, 1.5, 3.5, 'single feasible neighbour'),      #patterns 1 and 2 are both dead ends
+])
+def test_infeasible_layouts_are_reported(stim_rows, stim_columns, min_distance, max_distance, reason):
+    table = DistanceTable(stim_rows, stim_columns, min_distance, max_distance)
+    with pytest.raises(InfeasibleOrderError, match=reason):
+        check_feasibility(table, 0)
+    with pytest.raises(InfeasibleOrderError, match=reason):
+        warnsdorff_order(table, 0, seed=0)
+
+
+@pytest.mark.parametrize('start_pattern', [-1, 288, 999])
+def test_start_pattern_out_of_range(start_pattern):
+    with pytest.raises(IndexError):
+        warnsdorff_order(DistanceTable(24, 12, 5, 40), start_pattern)
+
+
+def test_neighbour_lists_are_int32():
+    table = DistanceTable(24, 12, 5, 40)
+    assert table.candidates(137).dtype == np.int32
+    assert table.in_window(table.distances(137, table.candidates(137))).all()
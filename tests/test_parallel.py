@@ -0,0 +1,20 @@
+from polygongrid.parallel import parallel_search
+
+
+def test_target_gives_same_order_for_any_worker_count():
+    kwargs = dict(runs=8, master_seed=7, optimize_moves=50000, target_min_distance=9)
+    serial = parallel_search(24, 12, 5, 40, 137, workers=1, **kwargs)
+    assert serial.order is not None
+    assert serial.min_distance >= 9
+    #Several finished runs can come back in one batch, so repeat to exercise the cancellation path
+    for _ in range(3):
+        parallel = parallel_search(24, 12, 5, 40, 137, workers=4, **kwargs)
+        assert parallel.order == serial.order
+        assert parallel.run == serial.run
+        assert parallel.runs_completed == serial.runs_completed
+
+
+def test_same_master_seed_same_order():
+    kwargs = dict(runs=3, master_seed=3, optimize_moves=5000)
+    assert (parallel_search(12, 6, 2, 40, 0, workers=1, **kwargs).order
+            == parallel_search(12, 6, 2, 40, 0, workers=2, **kwargs).order)
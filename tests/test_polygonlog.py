@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from polygongrid import SpotGrid, read_order, read_orders
+from polygongrid.polygonlog import gridpos_to_matrixpos, matrixpos_to_gridpos
+
+SHAPES = [(24, 12, 3), (24, 12, 1), (7, 10, 5), (12, 24, 2), (5, 1, 2), (1, 6, 4)]
+
+
+def write_log(path, spot_grid, order):
+    #Polygon400 run log layout: index, matrix columns, matrix rows, 1-indexed spot position
+    positions = gridpos_to_matrixpos(order, spot_grid)
+    np.savetxt(path, np.column_stack([np.arange(1, len(order) + 1), np.full(len(order), spot_grid.column_number),
+                                      np.full(len(order), spot_grid.row_number), positions]), fmt='%d')
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, grid_resolution', SHAPES)
+def test_matrix_positions_are_spot_top_left_pixels(stim_rows, stim_columns, grid_resolution):
+    grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+    positions = gridpos_to_matrixpos(np.arange(grid.stim_number), grid)
+    for pattern_number, position in enumerate(positions):
+        assert np.flatnonzero(grid.pattern(pattern_number).ravel())[0] + 1 == position
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, grid_resolution', SHAPES)
+def test_read_order_round_trip(tmp_path, stim_rows, stim_columns, grid_resolution):
+    grid = SpotGrid(stim_rows, stim_columns, grid_resolution)
+    order = np.random.default_rng(stim_rows*stim_columns).permutation(grid.stim_number)
+    path = tmp_path / 'run.txt'
+    write_log(path, grid, order)
+    assert read_order(path, stim_rows, stim_columns).tolist() == order.tolist()
+    assert read_order(path, stim_rows, stim_columns, grid_resolution).tolist() == order.tolist()
+
+
+def test_read_orders_directory(tmp_path):
+    orders = {}
+    for resolution in (1, 3):
+        grid = SpotGrid(24, 12, resolution)
+        orders['res%d.txt' % resolution] = np.random.default_rng(resolution).permutation(grid.stim_number)
+        write_log(tmp_path / ('res%d.txt' % resolution), grid, orders['res%d.txt' % resolution])
+    parsed = read_orders(tmp_path, 24, 12)
+    assert sorted(parsed) == sorted(orders)
+    for name, order in orders.items():
+        assert parsed[name].tolist() == order.tolist()
+
+
+@pytest.mark.parametrize('stim_rows, stim_columns, grid_resolution', [(24, 24, None), (24, 12, 2), (24, 12, 1),
+                                                                     (12, 12, None), (24, 6, None)])
+def test_read_order_rejects_wrong_grid(tmp_path, stim_rows, stim_columns, grid_resolution):
+    grid = SpotGrid(24, 12, 3)
+    path = tmp_path / 'run.txt'
+    write_log(path, grid, np.random.default_rng(0).permutation(grid.stim_number))
+    with pytest.raises(ValueError):
+        read_order(path, stim_rows, stim_columns, grid_resolution)
+
+
+def test_matches_original_resolution_1_formula():
+    #matrixpos2gridpos in the original script, hard-coded for a 12 column grid at resolution 1
+    def matrixpos2gridpos(matrixpos):
+        matrixpos -= 1
+        row_counter = matrixpos // 23
+        return int((matrixpos - row_counter*11)/2)
+
+    positions = gridpos_to_matrixpos(np.arange(288), SpotGrid(24, 12, 1))
+    assert matrixpos_to_gridpos(positions, 23, 12).tolist() == [matrixpos2gridpos(int(p)) for p in positions]